@@ -0,0 +1,388 @@
+"""
+Zenith Caching
+Multi-tier cache built around utils.cache_key: a size-bounded in-process
+LRU/TTL tier, an optional shared tier, tag-based invalidation and a
+@cached decorator with single-flight stampede protection.
+"""
+
+import asyncio
+import functools
+import inspect
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from codec import dumps, loads
+from utils import cache_key
+
+MISSING = object()
+
+TagSpec = Union[Iterable[str], Callable[..., Iterable[str]], None]
+
+
+class LRUCache:
+    """Thread-safe in-process cache with LRU eviction, per-entry TTL and tags"""
+
+    def __init__(self, max_entries: int = 10000, default_ttl: Optional[float] = 300.0):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._entries: "OrderedDict[str, Tuple[Any, Optional[float], Tuple[str, ...]]]" = OrderedDict()
+        self._tags: Dict[str, Set[str]] = {}
+        self._lock = threading.RLock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+
+    def get(self, key: str, default: Any = MISSING) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return default
+            value, expires_at, _ = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                self._remove(key)
+                self.stats["expirations"] += 1
+                self.stats["misses"] += 1
+                return default
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = MISSING, tags: Iterable[str] = ()) -> None:
+        ttl = self.default_ttl if ttl is MISSING else ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        tags = tuple(tags)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, expires_at, tags)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.stats["evictions"] += 1
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._remove(key)
+
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        """Remove every entry carrying any of the tags; returns the number removed"""
+        removed = 0
+        with self._lock:
+            for tag in tags:
+                for key in list(self._tags.get(tag, ())):
+                    self._remove(key)
+                    removed += 1
+            self.stats["invalidations"] += removed
+        return removed
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[2]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class RedisCache:
+    """
+    Shared tier for redis-py compatible clients; tags are stored as Redis sets.
+
+    Values go through the shared codec and come back as plain JSON data, so
+    TieredCache only accepts JSON-native values when a shared tier is set.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        namespace: str = "cache",
+        serializer: Callable[[Any], Union[str, bytes]] = dumps,
+        deserializer: Callable[[Union[str, bytes]], Any] = loads,
+    ):
+        self.client = client
+        self.namespace = namespace
+        self.serializer = serializer
+        self.deserializer = deserializer
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    def _tag_key(self, tag: str) -> str:
+        return f"{self.namespace}:tag:{tag}"
+
+    def get(self, key: str, default: Any = MISSING) -> Any:
+        value, _ = self.get_entry(key, default)
+        return value
+
+    def get_entry(self, key: str, default: Any = MISSING) -> Tuple[Any, List[str]]:
+        """Return (value, tags) so the local tier can keep tags for invalidation"""
+        raw = self.client.get(self._key(key))
+        if raw is None:
+            return default, []
+        value, tags = self.deserializer(raw)
+        return value, tags
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None, tags: Iterable[str] = ()) -> None:
+        tags = list(tags)
+        payload = self.serializer([value, tags])
+        pipe = self.client.pipeline()
+        if ttl is not None:
+            pipe.set(self._key(key), payload, px=int(ttl * 1000))
+        else:
+            pipe.set(self._key(key), payload)
+        for tag in tags:
+            pipe.sadd(self._tag_key(tag), key)
+        pipe.execute()
+
+    def delete(self, key: str) -> None:
+        self.client.delete(self._key(key))
+
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        removed = 0
+        for tag in tags:
+            keys = [k.decode() if isinstance(k, bytes) else k for k in self.client.smembers(self._tag_key(tag))]
+            if keys:
+                removed += self.client.delete(*[self._key(k) for k in keys])
+            self.client.delete(self._tag_key(tag))
+        return removed
+
+
+def _is_json_native(value: Any) -> bool:
+    """True if value survives a JSON round trip unchanged (no tuples, models or datetimes)"""
+    if value is None or isinstance(value, (str, bool, int, float)):
+        return True
+    if isinstance(value, list):
+        return all(_is_json_native(item) for item in value)
+    if isinstance(value, dict):
+        return all(isinstance(k, str) and _is_json_native(v) for k, v in value.items())
+    return False
+
+
+class TieredCache:
+    """
+    Local LRU tier in front of an optional shared tier, with single-flight loading.
+
+    With a shared tier, values must be JSON-native (dict, list, str, int,
+    float, bool, None) so a shared hit returns the same types as a local
+    one; anything else raises TypeError. Async methods run shared-tier I/O
+    in the default executor.
+    """
+
+    def __init__(self, local: Optional[LRUCache] = None, shared: Optional[RedisCache] = None):
+        self.local = local or LRUCache()
+        self.shared = shared
+        self._inflight: Dict[str, threading.Event] = {}
+        self._inflight_lock = threading.Lock()
+        self._async_inflight: Dict[str, "asyncio.Task"] = {}
+        self.stats = {"shared_hits": 0, "shared_misses": 0, "loads": 0, "coalesced": 0}
+
+    def get(self, key: str, default: Any = MISSING) -> Any:
+        value = self.local.get(key)
+        if value is not MISSING or self.shared is None:
+            return default if value is MISSING else value
+        return self._get_shared(key, default)
+
+    async def aget(self, key: str, default: Any = MISSING) -> Any:
+        """get() without blocking the event loop on the shared tier"""
+        value = self.local.get(key)
+        if value is not MISSING or self.shared is None:
+            return default if value is MISSING else value
+        return await asyncio.get_running_loop().run_in_executor(None, self._get_shared, key, default)
+
+    def _get_shared(self, key: str, default: Any) -> Any:
+        value, tags = self.shared.get_entry(key)
+        if value is MISSING:
+            self.stats["shared_misses"] += 1
+            return default
+        self.stats["shared_hits"] += 1
+        self.local.set(key, value, tags=tags)
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = MISSING, tags: Iterable[str] = ()) -> None:
+        tags = tuple(tags)
+        self._check_shareable(key, value)
+        self.local.set(key, value, ttl=ttl, tags=tags)
+        if self.shared is not None:
+            self.shared.set(key, value, ttl=self.local.default_ttl if ttl is MISSING else ttl, tags=tags)
+
+    async def aset(self, key: str, value: Any, ttl: Optional[float] = MISSING, tags: Iterable[str] = ()) -> None:
+        """set() without blocking the event loop on the shared tier"""
+        tags = tuple(tags)
+        self._check_shareable(key, value)
+        self.local.set(key, value, ttl=ttl, tags=tags)
+        if self.shared is not None:
+            shared_ttl = self.local.default_ttl if ttl is MISSING else ttl
+            await asyncio.get_running_loop().run_in_executor(
+                None, functools.partial(self.shared.set, key, value, ttl=shared_ttl, tags=tags)
+            )
+
+    def _check_shareable(self, key: str, value: Any) -> None:
+        if self.shared is not None and not _is_json_native(value):
+            raise TypeError(
+                f"Cannot cache {type(value).__name__} for '{key}' in the shared tier; "
+                "cache JSON-native values (dict, list, str, int, float, bool, None)"
+            )
+
+    def delete(self, key: str) -> None:
+        self.local.delete(key)
+        if self.shared is not None:
+            self.shared.delete(key)
+
+    def invalidate_tags(self, *tags: str) -> int:
+        """Drop every entry tagged with any of tags from both tiers"""
+        removed = self.local.invalidate_tags(tags)
+        if self.shared is not None:
+            removed += self.shared.invalidate_tags(tags)
+        return removed
+
+    def get_or_load(
+        self,
+        key: str,
+        loader: Callable[[], Any],
+        ttl: Optional[float] = MISSING,
+        tags: Iterable[str] = (),
+    ) -> Any:
+        """Return the cached value or call loader once, even under concurrent misses"""
+        value = self.get(key)
+        if value is not MISSING:
+            return value
+        with self._inflight_lock:
+            event = self._inflight.get(key)
+            leader = event is None
+            if leader:
+                event = self._inflight[key] = threading.Event()
+        if not leader:
+            self.stats["coalesced"] += 1
+            event.wait()
+            value = self.get(key)
+            if value is not MISSING:
+                return value
+            return self.get_or_load(key, loader, ttl, tags)
+        try:
+            self.stats["loads"] += 1
+            value = loader()
+            self.set(key, value, ttl=ttl, tags=tags)
+            return value
+        finally:
+            with self._inflight_lock:
+                del self._inflight[key]
+            event.set()
+
+    async def aget_or_load(
+        self,
+        key: str,
+        loader: Callable[[], Any],
+        ttl: Optional[float] = MISSING,
+        tags: Iterable[str] = (),
+    ) -> Any:
+        """
+        Async get_or_load; concurrent misses on one event loop share a single load.
+
+        The load runs in its own task, so cancelling the caller that started
+        it doesn't cancel the callers waiting on the same key.
+        """
+        value = self.local.get(key)
+        if value is not MISSING:
+            return value
+        task = self._async_inflight.get(key)
+        if task is not None:
+            self.stats["coalesced"] += 1
+        else:
+            task = asyncio.ensure_future(self._aload(key, loader, ttl, tags))
+            self._async_inflight[key] = task
+            task.add_done_callback(functools.partial(self._aload_done, key))
+        return await asyncio.shield(task)
+
+    async def _aload(self, key: str, loader: Callable[[], Any], ttl: Optional[float], tags: Iterable[str]) -> Any:
+        value = await self.aget(key)
+        if value is not MISSING:
+            return value
+        self.stats["loads"] += 1
+        value = await loader()
+        await self.aset(key, value, ttl=ttl, tags=tags)
+        return value
+
+    def _aload_done(self, key: str, task: "asyncio.Task") -> None:
+        self._async_inflight.pop(key, None)
+        # Mark retrieved so a load whose callers were all cancelled doesn't log "exception never retrieved"
+        if not task.cancelled():
+            task.exception()
+
+    def get_stats(self) -> Dict[str, int]:
+        """Hit/miss/eviction counters for both tiers"""
+        return {**self.local.stats, **self.stats, "size": len(self.local)}
+
+
+default_cache = TieredCache()
+
+
+def _resolve_tags(tags: TagSpec, args: tuple, kwargs: dict) -> List[str]:
+    if tags is None:
+        return []
+    if callable(tags):
+        return list(tags(*args, **kwargs))
+    return list(tags)
+
+
+def cached(
+    ttl: Optional[float] = MISSING,
+    prefix: Optional[str] = None,
+    tags: TagSpec = None,
+    cache: Optional[TieredCache] = None,
+    key: Optional[Callable[..., str]] = None,
+):
+    """
+    Cache a sync or async function's results.
+
+    Keys default to cache_key(prefix, *args, *sorted kwargs); `tags` may be a
+    list or a callable receiving the function's arguments. With a shared
+    tier the function must return JSON-native values (see TieredCache).
+    """
+    def decorator(func: Callable) -> Callable:
+        name = prefix or f"{func.__module__}.{func.__qualname__}"
+
+        def build_key(args: tuple, kwargs: dict) -> str:
+            if key is not None:
+                return key(*args, **kwargs)
+            return cache_key(name, *args, *(f"{k}={v}" for k, v in sorted(kwargs.items())))
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                target = cache or default_cache
+                return await target.aget_or_load(
+                    build_key(args, kwargs),
+                    lambda: func(*args, **kwargs),
+                    ttl=ttl,
+                    tags=_resolve_tags(tags, args, kwargs),
+                )
+            async_wrapper.cache_key = lambda *a, **kw: build_key(a, kw)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            target = cache or default_cache
+            return target.get_or_load(
+                build_key(args, kwargs),
+                lambda: func(*args, **kwargs),
+                ttl=ttl,
+                tags=_resolve_tags(tags, args, kwargs),
+            )
+        wrapper.cache_key = lambda *a, **kw: build_key(a, kw)
+        return wrapper
+
+    return decorator
@@ -0,0 +1,203 @@
+"""
+Zenith JSON Codec
+Pluggable JSON encoding: orjson or msgspec when installed, stdlib json
+otherwise. Encodes to bytes for direct response writes and handles
+datetime, UUID, Enum, dataclasses and pydantic models natively.
+"""
+
+import base64
+import dataclasses
+import json
+import time
+from datetime import date, datetime, time as dt_time
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Callable, Dict, Optional, Tuple, Type, Union
+from uuid import UUID
+
+# Conditional imports for optional dependencies
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import msgspec
+    MSGSPEC_AVAILABLE = True
+except ImportError:
+    MSGSPEC_AVAILABLE = False
+
+
+def json_default(obj: Any) -> Any:
+    """Convert values the JSON libraries don't handle natively"""
+    if hasattr(obj, "model_dump"):
+        # Python mode, so fields the JSON serializer rejects come back here
+        return obj.model_dump(mode="python")
+    if hasattr(obj, "dict") and hasattr(obj, "__fields__"):
+        return obj.dict()
+    if isinstance(obj, (datetime, date, dt_time)):
+        return obj.isoformat()
+    if isinstance(obj, Enum):
+        return obj.value
+    if isinstance(obj, (UUID, Decimal)):
+        return str(obj)
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, (bytes, bytearray, memoryview)):
+        return base64.b64encode(bytes(obj)).decode()
+    if hasattr(obj, "__struct_fields__"):
+        return {name: getattr(obj, name) for name in obj.__struct_fields__}
+    if hasattr(obj, "__slots__"):
+        return {name: getattr(obj, name) for name in obj.__slots__ if hasattr(obj, name)}
+    return str(obj)
+
+
+class StdlibCodec:
+    """json module codec (always available)"""
+    name = "json"
+    decode_errors: Tuple[Type[Exception], ...] = (json.JSONDecodeError, TypeError, ValueError)
+
+    def dumps(self, obj: Any) -> bytes:
+        return json.dumps(obj, default=json_default, separators=(",", ":")).encode()
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        return json.loads(data)
+
+
+class OrjsonCodec:
+    """orjson codec; fastest for dict/list payloads"""
+    name = "orjson"
+
+    def __init__(self):
+        self.decode_errors = (orjson.JSONDecodeError, TypeError, ValueError)
+        self._options = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+    def dumps(self, obj: Any) -> bytes:
+        return orjson.dumps(obj, default=json_default, option=self._options)
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        return orjson.loads(data)
+
+
+class MsgspecCodec:
+    """msgspec codec; fastest for msgspec Structs"""
+    name = "msgspec"
+
+    def __init__(self):
+        self.decode_errors = (msgspec.DecodeError, TypeError, ValueError)
+        self._encoder = msgspec.json.Encoder(enc_hook=json_default)
+        self._decoder = msgspec.json.Decoder()
+
+    def dumps(self, obj: Any) -> bytes:
+        return self._encoder.encode(obj)
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        return self._decoder.decode(data)
+
+
+_CODECS: Dict[str, Callable[[], Any]] = {"json": StdlibCodec}
+if ORJSON_AVAILABLE:
+    _CODECS["orjson"] = OrjsonCodec
+if MSGSPEC_AVAILABLE:
+    _CODECS["msgspec"] = MsgspecCodec
+
+_codec: Optional[Any] = None
+_stdlib_codec = StdlibCodec()
+
+
+def get_codec(name: Optional[str] = None) -> Any:
+    """Get a codec by name, or the fastest installed one"""
+    global _codec
+    if name is not None:
+        if name not in _CODECS:
+            raise ImportError(f"JSON codec '{name}' is not installed")
+        return _CODECS[name]()
+    if _codec is None:
+        for preferred in ("orjson", "msgspec", "json"):
+            if preferred in _CODECS:
+                _codec = _CODECS[preferred]()
+                break
+    return _codec
+
+
+def set_codec(name: str) -> None:
+    """Select the process-wide codec"""
+    global _codec
+    _codec = get_codec(name)
+
+
+def dumps(obj: Any) -> bytes:
+    """
+    Encode to JSON bytes with the active codec.
+
+    Falls back to the stdlib codec for values a fast codec rejects, such as
+    integers wider than 64 bits under orjson.
+    """
+    codec = get_codec()
+    try:
+        return codec.dumps(obj)
+    except (TypeError, ValueError, OverflowError):
+        if codec.name == _stdlib_codec.name:
+            raise
+        return _stdlib_codec.dumps(obj)
+
+
+def dumps_str(obj: Any) -> str:
+    """Encode to a JSON string with the active codec"""
+    return dumps(obj).decode()
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """Decode JSON with the active codec"""
+    return get_codec().loads(data)
+
+
+def dump_model(model: Any) -> bytes:
+    """
+    Encode a pydantic model (e.g. APIResponse) straight to bytes.
+
+    Uses pydantic v2's compiled serializer, with json_default for values it
+    can't handle; otherwise the active codec on the dumped dict.
+    """
+    serializer = getattr(type(model), "__pydantic_serializer__", None)
+    if serializer is not None:
+        try:
+            return serializer.to_json(model, fallback=json_default)
+        except Exception:
+            pass
+    return dumps(model)
+
+
+def benchmark_codecs(rows: int = 2000) -> Dict[str, float]:
+    """Compare the old json.dumps(default=str) path with each installed codec; returns ms per payload"""
+    from uuid import uuid4
+
+    payload = {
+        "success": True,
+        "message": "ok",
+        "data": [
+            {"id": str(uuid4()), "user_id": uuid4(), "created_at": datetime.utcnow(), "score": i * 0.5,
+             "tags": ["a", "b"], "is_read": bool(i % 2)}
+            for i in range(rows)
+        ],
+    }
+
+    def timed(func: Callable[[], Any], repeat: int = 20) -> float:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            func()
+        return (time.perf_counter() - start) * 1000 / repeat
+
+    results = {"json_default_str": timed(lambda: json.dumps(payload, default=str).encode())}
+    for name in _CODECS:
+        codec = get_codec(name)
+        results[name] = timed(lambda: codec.dumps(payload))
+    return results
+
+
+if __name__ == "__main__":
+    for name, value in benchmark_codecs().items():
+        print(f"{name:>18}: {value:8.2f} ms")
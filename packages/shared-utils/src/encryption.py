@@ -0,0 +1,243 @@
+"""
+Zenith Encryption
+Keyring of cached Fernet ciphers with MultiFernet rotation and batch
+encrypt/decrypt helpers for bulk re-encryption and export jobs, plus
+chunked streaming AEAD for large media payloads.
+"""
+
+import os
+import struct
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Union
+
+from utils import FERNET_AVAILABLE, get_fernet
+
+if FERNET_AVAILABLE:
+    from cryptography.exceptions import InvalidTag
+    from cryptography.fernet import Fernet, InvalidToken, MultiFernet
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+    from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+
+
+class Keyring:
+    """
+    Named Fernet keys with one primary key.
+
+    New data is encrypted with the primary key; decryption tries the primary
+    first and then every other key, so old ciphertext stays readable while
+    rotate()/rotate_many() re-encrypt it under the primary.
+    """
+
+    def __init__(self, keys: Dict[str, str], primary: str):
+        if not FERNET_AVAILABLE:
+            raise ImportError("cryptography is required for data encryption")
+        if primary not in keys:
+            raise ValueError(f"Primary key id '{primary}' is not in the keyring")
+        self._ciphers: Dict[str, "Fernet"] = {key_id: get_fernet(key) for key_id, key in keys.items()}
+        self.primary = primary
+        self._multi = self._build_multi()
+
+    def _build_multi(self) -> "MultiFernet":
+        ordered = [self._ciphers[self.primary]]
+        ordered += [cipher for key_id, cipher in self._ciphers.items() if key_id != self.primary]
+        return MultiFernet(ordered)
+
+    @property
+    def key_ids(self) -> List[str]:
+        return list(self._ciphers)
+
+    def cipher(self, key_id: Optional[str] = None) -> "Fernet":
+        """Get the cached Fernet for a key id (the primary by default)"""
+        return self._ciphers[key_id or self.primary]
+
+    def add_key(self, key_id: str, key: str, make_primary: bool = False) -> None:
+        """Add a key, optionally promoting it to primary for new encryptions"""
+        self._ciphers[key_id] = get_fernet(key)
+        if make_primary:
+            self.primary = key_id
+        self._multi = self._build_multi()
+
+    def remove_key(self, key_id: str) -> None:
+        """Retire a key once nothing encrypted with it remains"""
+        if key_id == self.primary:
+            raise ValueError("Cannot remove the primary key")
+        del self._ciphers[key_id]
+        self._multi = self._build_multi()
+
+    def encrypt_bytes(self, data: bytes) -> bytes:
+        """Encrypt bytes with the primary key"""
+        return self._ciphers[self.primary].encrypt(data)
+
+    def decrypt_bytes(self, token: bytes, ttl: Optional[int] = None) -> bytes:
+        """Decrypt a token made with any key in the ring"""
+        return self._multi.decrypt(token, ttl=ttl)
+
+    def encrypt(self, data: str) -> str:
+        """Encrypt a string with the primary key"""
+        return self.encrypt_bytes(data.encode()).decode()
+
+    def decrypt(self, token: str, ttl: Optional[int] = None) -> str:
+        """Decrypt a string token made with any key in the ring"""
+        return self.decrypt_bytes(token.encode(), ttl=ttl).decode()
+
+    def rotate(self, token: Union[str, bytes]) -> bytes:
+        """Re-encrypt a token under the primary key, keeping its original timestamp"""
+        return self._multi.rotate(token.encode() if isinstance(token, str) else token)
+
+    def encrypt_many(self, items: Iterable[Union[str, bytes]]) -> List[bytes]:
+        """Encrypt many values with the primary key"""
+        encrypt = self._ciphers[self.primary].encrypt
+        return [encrypt(item.encode() if isinstance(item, str) else item) for item in items]
+
+    def decrypt_many(
+        self,
+        tokens: Iterable[Union[str, bytes]],
+        ttl: Optional[int] = None,
+        errors: str = "raise",
+    ) -> List[Optional[bytes]]:
+        """
+        Decrypt many tokens.
+
+        With errors="ignore", tokens that fail to decrypt yield None instead
+        of aborting the whole batch.
+        """
+        decrypt = self._multi.decrypt
+        results: List[Optional[bytes]] = []
+        for token in tokens:
+            try:
+                results.append(decrypt(token, ttl=ttl))
+            except InvalidToken:
+                if errors != "ignore":
+                    raise
+                results.append(None)
+        return results
+
+    def rotate_many(self, tokens: Iterable[Union[str, bytes]]) -> List[bytes]:
+        """Re-encrypt many tokens under the primary key"""
+        rotate = self._multi.rotate
+        return [rotate(token.encode() if isinstance(token, str) else token) for token in tokens]
+
+
+# Streaming format (STREAM construction, as in Tink's AES-GCM-HKDF streaming AEAD):
+#   header  = magic | version | chunk size | salt | nonce prefix
+#   segment = AES-GCM(chunk) + 16-byte tag, nonce = prefix | counter | last-chunk flag
+# A per-stream key is derived from the master key and salt with HKDF, and the
+# last-chunk flag makes truncation and reordering detectable.
+STREAM_MAGIC = b"ZSE"
+STREAM_VERSION = 1
+STREAM_CHUNK_SIZE = 64 * 1024
+# Upper bound on the header's chunk size, so a crafted header can't make
+# the reader buffer gigabytes before the first tag is checked
+STREAM_MAX_CHUNK_SIZE = 1024 * 1024
+_HEADER = struct.Struct(">3sBI16s7s")
+_TAG_SIZE = 16
+
+
+class StreamDecryptionError(Exception):
+    """Raised when an encrypted stream is malformed, truncated or tampered with"""
+
+
+def generate_stream_key() -> bytes:
+    """Generate a 256-bit master key for streaming encryption"""
+    if not FERNET_AVAILABLE:
+        raise ImportError("cryptography is required for data encryption")
+    return AESGCM.generate_key(bit_length=256)
+
+
+def _stream_cipher(key: bytes, header: bytes, salt: bytes) -> "AESGCM":
+    derived = HKDF(algorithm=hashes.SHA256(), length=32, salt=salt, info=header[:8]).derive(key)
+    return AESGCM(derived)
+
+
+def _nonce(prefix: bytes, counter: int, last: bool) -> bytes:
+    return prefix + struct.pack(">IB", counter, 1 if last else 0)
+
+
+def _read_exact(src: BinaryIO, size: int) -> bytes:
+    """Read up to size bytes, looping over short reads from pipes and sockets"""
+    parts = []
+    remaining = size
+    while remaining:
+        part = src.read(remaining)
+        if not part:
+            break
+        parts.append(part)
+        remaining -= len(part)
+    return b"".join(parts)
+
+
+def iter_encrypt(src: BinaryIO, key: bytes, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+    """Yield the encrypted stream for a file-like object, holding at most two chunks in memory"""
+    if not FERNET_AVAILABLE:
+        raise ImportError("cryptography is required for data encryption")
+    if not 0 < chunk_size <= STREAM_MAX_CHUNK_SIZE:
+        raise ValueError(f"chunk_size must be between 1 and {STREAM_MAX_CHUNK_SIZE} bytes")
+    salt = os.urandom(16)
+    prefix = os.urandom(7)
+    header = _HEADER.pack(STREAM_MAGIC, STREAM_VERSION, chunk_size, salt, prefix)
+    cipher = _stream_cipher(key, header, salt)
+    yield header
+
+    counter = 0
+    chunk = _read_exact(src, chunk_size)
+    while True:
+        following = _read_exact(src, chunk_size) if len(chunk) == chunk_size else b""
+        last = not following
+        yield cipher.encrypt(_nonce(prefix, counter, last), chunk, header)
+        if last:
+            return
+        chunk = following
+        counter += 1
+
+
+def iter_decrypt(src: BinaryIO, key: bytes) -> Iterator[bytes]:
+    """Yield decrypted chunks from an encrypted stream, verifying each before it is released"""
+    if not FERNET_AVAILABLE:
+        raise ImportError("cryptography is required for data decryption")
+    header = _read_exact(src, _HEADER.size)
+    if len(header) != _HEADER.size:
+        raise StreamDecryptionError("Encrypted stream header is truncated")
+    magic, version, chunk_size, salt, prefix = _HEADER.unpack(header)
+    if magic != STREAM_MAGIC or version != STREAM_VERSION:
+        raise StreamDecryptionError("Not a supported encrypted stream")
+    if not 0 < chunk_size <= STREAM_MAX_CHUNK_SIZE:
+        raise StreamDecryptionError(f"Encrypted stream chunk size {chunk_size} is out of range")
+    cipher = _stream_cipher(key, header, salt)
+
+    segment_size = chunk_size + _TAG_SIZE
+    counter = 0
+    segment = _read_exact(src, segment_size)
+    while True:
+        following = _read_exact(src, segment_size) if len(segment) == segment_size else b""
+        last = not following
+        try:
+            yield cipher.decrypt(_nonce(prefix, counter, last), segment, header)
+        except InvalidTag:
+            raise StreamDecryptionError(f"Chunk {counter} failed authentication") from None
+        if last:
+            return
+        segment = following
+        counter += 1
+
+
+def encrypt_stream(src: BinaryIO, dst: BinaryIO, key: bytes, chunk_size: int = STREAM_CHUNK_SIZE) -> int:
+    """Encrypt src into dst; returns bytes written"""
+    written = 0
+    for part in iter_encrypt(src, key, chunk_size):
+        dst.write(part)
+        written += len(part)
+    return written
+
+
+def decrypt_stream(src: BinaryIO, dst: BinaryIO, key: bytes) -> int:
+    """
+    Decrypt src into dst; returns plaintext bytes written.
+
+    Chunks are authenticated individually, so on StreamDecryptionError dst may
+    already hold a verified prefix and should be discarded.
+    """
+    written = 0
+    for part in iter_decrypt(src, key):
+        dst.write(part)
+        written += len(part)
+    return written
@@ -0,0 +1,250 @@
+"""
+Zenith Keyset Pagination
+Opaque cursors over indexed sort columns such as (created_at, id), keyset
+predicates for SQLAlchemy queries, and planner-estimated totals, so long
+lists like messages and notifications need neither COUNT(*) nor deep
+OFFSET scans.
+"""
+
+import base64
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+from codec import dumps, get_codec, loads
+
+# Conditional imports for optional dependencies
+try:
+    from sqlalchemy import and_, or_, tuple_
+    from sqlalchemy.sql import operators
+    SQLALCHEMY_AVAILABLE = True
+except ImportError:
+    SQLALCHEMY_AVAILABLE = False
+
+CURSOR_VERSION = 1
+
+
+@dataclass(frozen=True)
+class Cursor:
+    """Decoded cursor: sort-key values of a boundary row and the paging direction"""
+    values: Tuple[Any, ...]
+    backward: bool = False
+
+
+# Type tags so sort keys round-trip through JSON with their original types
+_ENCODERS = (
+    (datetime, "dt", datetime.isoformat),
+    (date, "d", date.isoformat),
+    (UUID, "u", str),
+    (Decimal, "n", str),
+)
+_DECODERS = {"dt": datetime.fromisoformat, "d": date.fromisoformat, "u": UUID, "n": Decimal}
+
+
+def _encode_value(value: Any) -> Any:
+    for value_type, tag, encode in _ENCODERS:
+        if isinstance(value, value_type):
+            return [tag, encode(value)]
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, list):
+        tag, raw = value
+        return _DECODERS[tag](raw)
+    return value
+
+
+def encode_cursor(values: Sequence[Any], backward: bool = False) -> str:
+    """Encode sort-key values into an opaque, URL-safe cursor"""
+    payload = [CURSOR_VERSION, int(backward), [_encode_value(value) for value in values]]
+    return base64.urlsafe_b64encode(dumps(payload)).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str, key_count: Optional[int] = None) -> Cursor:
+    """Decode a cursor from encode_cursor; raises ValueError if it is malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        version, backward, values = loads(raw)
+        if version != CURSOR_VERSION:
+            raise ValueError(f"unsupported version {version}")
+        decoded = tuple(_decode_value(value) for value in values)
+    except (*get_codec().decode_errors, KeyError, TypeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {e}") from None
+    if key_count is not None and len(decoded) != key_count:
+        raise ValueError("Invalid cursor: sort key mismatch")
+    return Cursor(decoded, bool(backward))
+
+
+def _split_ordering(expression: Any) -> Tuple[Any, bool]:
+    """(column, descending) for a column or a column.asc()/.desc() expression"""
+    modifier = getattr(expression, "modifier", None)
+    if modifier is operators.desc_op:
+        return expression.element, True
+    if modifier is operators.asc_op:
+        return expression.element, False
+    return expression, False
+
+
+def _key_name(column: Any) -> str:
+    return getattr(column, "key", None) or column.name
+
+
+def keyset_predicate(order_by: Sequence[Any], values: Sequence[Any], backward: bool = False):
+    """
+    WHERE clause selecting rows after (or, backward, before) the row with
+    the given sort-key values under the order_by ordering.
+
+    Uniform directions use a row comparison, which PostgreSQL serves from
+    a composite index; mixed directions expand to OR-ed prefixes.
+    """
+    if not SQLALCHEMY_AVAILABLE:
+        raise ImportError("sqlalchemy is required for keyset pagination")
+    keys = [_split_ordering(expression) for expression in order_by]
+    if len(keys) != len(values):
+        raise ValueError("Cursor values don't match the sort columns")
+
+    def after(column: Any, descending: bool, value: Any):
+        return column < value if descending != backward else column > value
+
+    directions = {descending for _, descending in keys}
+    if len(directions) == 1:
+        columns = [column for column, _ in keys]
+        if len(columns) == 1:
+            return after(columns[0], directions.pop(), values[0])
+        return after(tuple_(*columns), directions.pop(), tuple_(*values))
+
+    clauses = []
+    for i, (column, descending) in enumerate(keys):
+        equal_prefix = [keys[j][0] == values[j] for j in range(i)]
+        clauses.append(and_(*equal_prefix, after(column, descending, values[i])))
+    return or_(*clauses)
+
+
+def paginate_query(statement: Any, order_by: Sequence[Any], cursor: Optional[str], limit: int):
+    """
+    Apply keyset pagination to a SELECT.
+
+    Adds the cursor predicate, the ordering (reversed when paging
+    backward) and LIMIT limit + 1, so build_cursor_page can tell whether
+    another page exists without counting.
+    """
+    if not SQLALCHEMY_AVAILABLE:
+        raise ImportError("sqlalchemy is required for keyset pagination")
+    backward = False
+    if cursor:
+        decoded = decode_cursor(cursor, len(order_by))
+        backward = decoded.backward
+        statement = statement.where(keyset_predicate(order_by, decoded.values, backward))
+    ordering = []
+    for expression in order_by:
+        column, descending = _split_ordering(expression)
+        ordering.append(column.asc() if descending == backward else column.desc())
+    return statement.order_by(*ordering).limit(limit + 1)
+
+
+def _row_key(row: Any, names: List[str]) -> List[Any]:
+    if isinstance(row, dict):
+        return [row[name] for name in names]
+    return [getattr(row, name) for name in names]
+
+
+def build_cursor_page(
+    rows: Sequence[Any],
+    order_by: Sequence[Any],
+    cursor: Optional[str],
+    limit: int,
+    estimated_total: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Turn rows fetched with paginate_query into a page.
+
+    Returns the items in display order as data, plus next/prev cursors,
+    has_next/has_prev flags and estimated_total, so the result can be
+    passed straight to CursorPage(success=True, message=..., **page).
+    """
+    names = [_key_name(_split_ordering(expression)[0]) for expression in order_by]
+    backward = decode_cursor(cursor).backward if cursor else False
+    has_more = len(rows) > limit
+    items = list(rows[:limit])
+    if backward:
+        items.reverse()
+        has_next, has_prev = True, has_more
+    else:
+        has_next, has_prev = has_more, cursor is not None
+    return {
+        "data": items,
+        "next_cursor": encode_cursor(_row_key(items[-1], names)) if items and has_next else None,
+        "prev_cursor": encode_cursor(_row_key(items[0], names), backward=True) if items and has_prev else None,
+        "has_next": has_next,
+        "has_prev": has_prev,
+        "limit": limit,
+        "estimated_total": estimated_total,
+    }
+
+
+def _result_rows(result: Any, statement: Any) -> List[Any]:
+    # ORM entities for select(Model), Row objects for column selects
+    if len(statement.column_descriptions) == 1:
+        return list(result.scalars().all())
+    return list(result.all())
+
+
+def fetch_cursor_page(session: Any, statement: Any, order_by: Sequence[Any], params: Any) -> Dict[str, Any]:
+    """
+    Run a keyset-paginated SELECT for CursorParams (cursor, limit, include_estimate)
+    and build the page, with estimated_total filled in when requested.
+    """
+    result = session.execute(paginate_query(statement, order_by, params.cursor, params.limit))
+    rows = _result_rows(result, statement)
+    estimated_total = estimate_count(session, statement) if params.include_estimate else None
+    return build_cursor_page(rows, order_by, params.cursor, params.limit, estimated_total)
+
+
+async def fetch_cursor_page_async(session: Any, statement: Any, order_by: Sequence[Any], params: Any) -> Dict[str, Any]:
+    """fetch_cursor_page for an AsyncSession"""
+    result = await session.execute(paginate_query(statement, order_by, params.cursor, params.limit))
+    rows = _result_rows(result, statement)
+    estimated_total = await estimate_count_async(session, statement) if params.include_estimate else None
+    return build_cursor_page(rows, order_by, params.cursor, params.limit, estimated_total)
+
+
+def _explain_args(connection: Any, statement: Any) -> Tuple[str, Any]:
+    # Expand IN lists into bind parameters instead of leaving POSTCOMPILE placeholders
+    compiled = statement.compile(dialect=connection.dialect, compile_kwargs={"render_postcompile": True})
+    params = compiled.params
+    if compiled.positional:
+        params = tuple(params[name] for name in compiled.positiontup)
+    return f"EXPLAIN (FORMAT JSON) {compiled}", params
+
+
+def _plan_rows(plan: Any) -> int:
+    if isinstance(plan, (str, bytes)):
+        plan = loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def estimate_count(session: Any, statement: Any) -> Optional[int]:
+    """
+    Planner row estimate for a SELECT (pass it without pagination applied).
+
+    Uses EXPLAIN instead of COUNT(*), so it is approximate but cheap; returns
+    None on databases other than PostgreSQL.
+    """
+    connection = session.connection()
+    if connection.dialect.name != "postgresql":
+        return None
+    sql, params = _explain_args(connection, statement)
+    return _plan_rows(connection.exec_driver_sql(sql, params).scalar())
+
+
+async def estimate_count_async(session: Any, statement: Any) -> Optional[int]:
+    """estimate_count for an AsyncSession"""
+    connection = await session.connection()
+    if connection.dialect.name != "postgresql":
+        return None
+    sql, params = _explain_args(connection, statement)
+    result = await connection.exec_driver_sql(sql, params)
+    return _plan_rows(result.scalar())
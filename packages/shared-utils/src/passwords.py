@@ -0,0 +1,267 @@
+"""
+Zenith Password Hashing
+Async password hashing and verification on a dedicated, size-bounded worker
+pool so bcrypt never runs on the event loop, plus cost calibration for the
+current hardware.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from utils import (
+    configure_password_hashing,
+    get_password_hashing_settings,
+    hash_password,
+    verify_and_update_password,
+    verify_password,
+)
+
+
+class PasswordHasherOverloaded(Exception):
+    """Raised when the hashing queue is full; callers should answer 503/429"""
+
+
+class PasswordHasherPool:
+    """
+    Runs hash_password/verify_password off the event loop.
+
+    At most `max_workers` hashes run at once and at most `max_queue` more
+    wait; further requests are shed with PasswordHasherOverloaded instead of
+    piling up behind a slow queue. bcrypt releases the GIL, so threads scale
+    across cores; use_processes=True isolates hashing from the app process.
+    Worker processes are configured with the parent's hashing settings and
+    are replaced when configure_password_hashing changes them.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        max_queue: Optional[int] = None,
+        use_processes: bool = False,
+    ):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_queue = self.max_workers * 4 if max_queue is None else max_queue
+        self.use_processes = use_processes
+        self._executor: Optional[Executor] = None
+        self._executor_settings: Optional[Dict[str, Any]] = None
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self.stats = {"completed": 0, "failed": 0, "cancelled": 0, "shed": 0}
+
+    @property
+    def executor(self) -> Executor:
+        if not self.use_processes:
+            if self._executor is None:
+                with self._lock:
+                    if self._executor is None:
+                        self._executor = ThreadPoolExecutor(
+                            max_workers=self.max_workers, thread_name_prefix="password-hasher"
+                        )
+            return self._executor
+        settings = get_password_hashing_settings()
+        if self._executor is None or settings != self._executor_settings:
+            stale = None
+            with self._lock:
+                if self._executor is None or settings != self._executor_settings:
+                    stale = self._executor
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.max_workers, initializer=_configure_worker, initargs=(settings,)
+                    )
+                    self._executor_settings = settings
+            if stale is not None:
+                # Hashes already submitted finish at the old settings
+                stale.shutdown(wait=False)
+        return self._executor
+
+    @property
+    def queue_depth(self) -> int:
+        """Requests waiting for a worker"""
+        return max(self._in_flight - self.max_workers, 0)
+
+    async def _run(self, func: Callable[..., Any], *args: Any) -> Any:
+        with self._lock:
+            if self._in_flight >= self.max_workers + self.max_queue:
+                self.stats["shed"] += 1
+                raise PasswordHasherOverloaded("Password hashing queue is full")
+            self._in_flight += 1
+        outcome = "failed"
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+            outcome = "completed"
+            return result
+        except asyncio.CancelledError:
+            outcome = "cancelled"
+            raise
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+                self.stats[outcome] += 1
+
+    async def hash(self, password: str) -> str:
+        """Hash a password on the worker pool"""
+        return await self._run(hash_password, password)
+
+    async def verify(self, password: str, hashed: str) -> bool:
+        """Verify a password against its hash on the worker pool"""
+        return await self._run(verify_password, password, hashed)
+
+    async def verify_and_update(self, password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+        """Verify on the worker pool, returning a replacement hash when the stored one is outdated"""
+        return await self._run(verify_and_update_password, password, hashed)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the worker pool; it is recreated on next use"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+
+def _configure_worker(settings: Dict[str, Any]) -> None:
+    """Process pool initializer: apply the parent's hashing settings"""
+    if settings:
+        configure_password_hashing(**settings)
+
+
+_default_pool: Optional[PasswordHasherPool] = None
+
+
+def get_password_pool() -> PasswordHasherPool:
+    """Get the process-wide password hashing pool"""
+    global _default_pool
+    if _default_pool is None:
+        _default_pool = PasswordHasherPool()
+    return _default_pool
+
+
+async def hash_password_async(password: str) -> str:
+    """Hash a password without blocking the event loop"""
+    return await get_password_pool().hash(password)
+
+
+async def verify_password_async(password: str, hashed: str) -> bool:
+    """Verify a password without blocking the event loop"""
+    return await get_password_pool().verify(password, hashed)
+
+
+async def verify_and_update_password_async(password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password without blocking the event loop.
+
+    Returns (valid, new_hash); persist new_hash when it is not None so hashes
+    upgrade to the current scheme and cost on login.
+    """
+    return await get_password_pool().verify_and_update(password, hashed)
+
+
+def _time_hash(handler: Any) -> float:
+    """Milliseconds for one hash with the given passlib handler"""
+    start = time.perf_counter()
+    handler.hash("calibration-password")
+    return (time.perf_counter() - start) * 1000
+
+
+def calibrate_bcrypt_rounds(target_ms: float = 250.0, min_rounds: int = 10, max_rounds: int = 16) -> int:
+    """Highest bcrypt cost whose hash time stays within target_ms on this machine"""
+    from passlib.hash import bcrypt
+
+    rounds = min_rounds
+    while rounds < max_rounds and _time_hash(bcrypt.using(rounds=rounds + 1)) <= target_ms:
+        rounds += 1
+    return rounds
+
+
+def calibrate_argon2_time_cost(
+    target_ms: float = 250.0,
+    memory_cost: int = 65536,
+    parallelism: int = 2,
+    max_time_cost: int = 10,
+) -> int:
+    """Highest argon2id time cost whose hash time stays within target_ms for the given memory and lanes"""
+    from passlib.hash import argon2
+
+    time_cost = 1
+    while time_cost < max_time_cost and _time_hash(
+        argon2.using(type="ID", time_cost=time_cost + 1, memory_cost=memory_cost, parallelism=parallelism)
+    ) <= target_ms:
+        time_cost += 1
+    return time_cost
+
+
+def calibrate_password_hashing(
+    target_ms: float = 250.0,
+    scheme: str = "bcrypt",
+    argon2_memory_cost: int = 65536,
+    argon2_parallelism: int = 2,
+) -> Dict[str, Any]:
+    """
+    Pick the cost that hits target_ms per hash on this machine and apply it.
+
+    Existing hashes with a different cost or scheme are reported as needing
+    a rehash by verify_and_update_password, so they upgrade on next login.
+    """
+    if scheme == "argon2id":
+        time_cost = calibrate_argon2_time_cost(target_ms, argon2_memory_cost, argon2_parallelism)
+        settings = {
+            "scheme": scheme,
+            "argon2_time_cost": time_cost,
+            "argon2_memory_cost": argon2_memory_cost,
+            "argon2_parallelism": argon2_parallelism,
+        }
+    else:
+        settings = {"scheme": scheme, "bcrypt_rounds": calibrate_bcrypt_rounds(target_ms)}
+    configure_password_hashing(**settings)
+    return settings
+
+
+def benchmark_login_throughput(logins: int = 64, concurrency: int = 16) -> Dict[str, float]:
+    """
+    Compare verify throughput with bcrypt on the event loop vs. on the pool.
+
+    Returns logins/second overall and per core for each mode.
+    """
+    hashed = hash_password("benchmark-password")
+    cores = os.cpu_count() or 1
+
+    async def on_loop() -> None:
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def login() -> None:
+            async with semaphore:
+                verify_password("benchmark-password", hashed)
+
+        await asyncio.gather(*(login() for _ in range(logins)))
+
+    async def on_pool(pool: PasswordHasherPool) -> None:
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def login() -> None:
+            async with semaphore:
+                await pool.verify("benchmark-password", hashed)
+
+        await asyncio.gather(*(login() for _ in range(logins)))
+
+    results: Dict[str, float] = {"cores": float(cores)}
+    start = time.perf_counter()
+    asyncio.run(on_loop())
+    elapsed = time.perf_counter() - start
+    results["event_loop_per_sec"] = logins / elapsed
+    results["event_loop_per_core"] = logins / elapsed / cores
+
+    pool = PasswordHasherPool(max_queue=logins)
+    start = time.perf_counter()
+    asyncio.run(on_pool(pool))
+    elapsed = time.perf_counter() - start
+    pool.shutdown()
+    results["pool_per_sec"] = logins / elapsed
+    results["pool_per_core"] = logins / elapsed / cores
+    return results
+
+
+if __name__ == "__main__":
+    for name, value in benchmark_login_throughput().items():
+        print(f"{name:>22}: {value:,.2f}")
@@ -0,0 +1,158 @@
+"""
+Zenith QR Codes
+QR code rendering for 2FA setup and sharing: PNG or raster-free SVG as raw
+bytes, an opt-in content-addressed cache keyed by the payload hash, and an
+async variant that renders off the event loop.
+"""
+
+import asyncio
+import hashlib
+import io
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from cache import MISSING, LRUCache
+
+# Conditional imports for optional dependencies
+try:
+    import qrcode
+    QRCODE_AVAILABLE = True
+except ImportError:
+    QRCODE_AVAILABLE = False
+
+QR_CONTENT_TYPES = {"png": "image/png", "svg": "image/svg+xml"}
+
+# Only for non-secret payloads such as share links: a cached image encodes
+# its payload, so TOTP provisioning URIs would keep the secret in memory.
+# Those are skipped unless cache_secrets=True.
+qr_cache = LRUCache(max_entries=512, default_ttl=300.0)
+SECRET_PAYLOAD_PREFIXES = ("otpauth://", "otpauth-migration://")
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="qr-render")
+    return _executor
+
+
+def qr_cache_key(data: str, fmt: str = "png", box_size: int = 10, border: int = 5) -> str:
+    """Content-addressed cache key for a rendered QR code"""
+    digest = hashlib.sha256(f"{fmt}:{box_size}:{border}:{data}".encode()).hexdigest()
+    return f"qr:{digest}"
+
+
+def _cacheable(data: str, use_cache: bool, cache_secrets: bool) -> bool:
+    return use_cache and (cache_secrets or not data.lower().startswith(SECRET_PAYLOAD_PREFIXES))
+
+
+def _build(data: str, box_size: int, border: int) -> "qrcode.QRCode":
+    qr = qrcode.QRCode(version=1, box_size=box_size, border=border)
+    qr.add_data(data)
+    qr.make(fit=True)
+    return qr
+
+
+def _render_png(data: str, box_size: int, border: int) -> bytes:
+    img = _build(data, box_size, border).make_image(fill_color="black", back_color="white")
+    buffer = io.BytesIO()
+    img.save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def _render_svg(data: str, box_size: int, border: int) -> bytes:
+    """One <path> from runs of dark modules; no image library involved"""
+    matrix = _build(data, 1, border).get_matrix()
+    size = len(matrix)
+    path: List[str] = []
+    for y, row in enumerate(matrix):
+        x = 0
+        while x < size:
+            if not row[x]:
+                x += 1
+                continue
+            start = x
+            while x < size and row[x]:
+                x += 1
+            path.append(f"M{start},{y}h{x - start}v1h-{x - start}z")
+    pixels = size * box_size
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{pixels}" height="{pixels}" '
+        f'viewBox="0 0 {size} {size}" shape-rendering="crispEdges">'
+        f'<rect width="{size}" height="{size}" fill="#fff"/>'
+        f'<path d="{"".join(path)}" fill="#000"/></svg>'
+    ).encode()
+
+
+_RENDERERS = {"png": _render_png, "svg": _render_svg}
+
+
+def render_qr_code(
+    data: str,
+    fmt: str = "png",
+    box_size: int = 10,
+    border: int = 5,
+    use_cache: bool = False,
+    cache_secrets: bool = False,
+) -> bytes:
+    """
+    Render a QR code as PNG or SVG bytes, suitable for streaming responses.
+
+    With use_cache=True the image is kept in qr_cache, except for otpauth://
+    payloads unless cache_secrets=True.
+    """
+    if not QRCODE_AVAILABLE:
+        raise ImportError("qrcode is required for QR code generation")
+    if fmt not in _RENDERERS:
+        raise ValueError(f"Unsupported QR code format '{fmt}'")
+    if not _cacheable(data, use_cache, cache_secrets):
+        return _RENDERERS[fmt](data, box_size, border)
+    key = qr_cache_key(data, fmt, box_size, border)
+    image = qr_cache.get(key)
+    if image is MISSING:
+        image = _RENDERERS[fmt](data, box_size, border)
+        qr_cache.set(key, image)
+    return image
+
+
+async def render_qr_code_async(
+    data: str,
+    fmt: str = "png",
+    box_size: int = 10,
+    border: int = 5,
+    use_cache: bool = False,
+    cache_secrets: bool = False,
+) -> bytes:
+    """Render a QR code without blocking the event loop; cache hits return without a thread hop"""
+    if QRCODE_AVAILABLE and _cacheable(data, use_cache, cache_secrets):
+        image = qr_cache.get(qr_cache_key(data, fmt, box_size, border))
+        if image is not MISSING:
+            return image
+    return await asyncio.get_running_loop().run_in_executor(
+        _get_executor(), render_qr_code, data, fmt, box_size, border, use_cache, cache_secrets
+    )
+
+
+def benchmark_qr(renders: int = 200) -> Dict[str, float]:
+    """Milliseconds per render for uncached PNG and SVG, and for a cache hit"""
+    uri = "https://example.com/share/profile/3f2b9c1e-8a4d-4f6b-9e21-7c5d0a1b2c3d?ref=qr"
+
+    def timed(fmt: str, use_cache: bool) -> float:
+        start = time.perf_counter()
+        for _ in range(renders):
+            render_qr_code(uri, fmt, use_cache=use_cache)
+        return (time.perf_counter() - start) * 1000 / renders
+
+    return {"png": timed("png", False), "svg": timed("svg", False), "cached": timed("png", True)}
+
+
+if __name__ == "__main__":
+    for name, value in benchmark_qr().items():
+        print(f"{name:>8}: {value:8.3f} ms")
@@ -0,0 +1,347 @@
+"""
+Zenith Rate Limiting
+Token bucket and sliding window rate limiters with an in-memory store and a
+pluggable shared (Redis-compatible) backend. Usage is synced to Postgres in
+the background instead of writing on every guarded call.
+"""
+
+import heapq
+import logging
+import threading
+import time
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from utils import rate_limit_key
+
+logger = logging.getLogger(__name__)
+
+TOKEN_BUCKET = "token_bucket"
+SLIDING_WINDOW = "sliding_window"
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """A limit of `limit` requests per `window` seconds"""
+    limit: int
+    window: float
+    algorithm: str = TOKEN_BUCKET
+    burst: Optional[int] = None  # token bucket capacity, defaults to limit
+
+    @property
+    def capacity(self) -> int:
+        return self.burst or self.limit
+
+    @classmethod
+    def per_minutes(cls, limit: int, minutes: int = 60, algorithm: str = SLIDING_WINDOW) -> "RateLimit":
+        """Build a limit with the same shape as the check_rate_limit() SQL function"""
+        return cls(limit=limit, window=minutes * 60, algorithm=algorithm)
+
+
+@dataclass(frozen=True)
+class RateLimitResult:
+    """Outcome of a rate limit check"""
+    allowed: bool
+    limit: int
+    remaining: int
+    retry_after: float = 0.0
+
+
+class RateLimitBackend:
+    """Storage backend interface; implementations must apply each hit atomically"""
+
+    def hit(self, key: str, rule: RateLimit, cost: int, now: float) -> RateLimitResult:
+        raise NotImplementedError
+
+    def reset(self, key: str) -> None:
+        raise NotImplementedError
+
+
+class MemoryBackend(RateLimitBackend):
+    """
+    Process-local backend; also serves as a stand-in for the shared backend in tests.
+
+    Each key expires once its state no longer matters (a full bucket, or two
+    elapsed windows) and expired keys are swept every `sweep_interval`
+    seconds. Beyond `max_keys` the keys closest to expiry are dropped early,
+    in one batch down to `trim_ratio` of the cap so the scan is amortized
+    over many new keys.
+    """
+
+    def __init__(self, max_keys: int = 100000, sweep_interval: float = 60.0, trim_ratio: float = 0.9):
+        self.max_keys = max_keys
+        self.trim_ratio = trim_ratio
+        self.sweep_interval = sweep_interval
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._windows: Dict[str, Tuple[float, int, int]] = {}
+        self._expires: Dict[str, float] = {}
+        self._next_sweep = 0.0
+        self._lock = threading.Lock()
+
+    def hit(self, key: str, rule: RateLimit, cost: int, now: float) -> RateLimitResult:
+        with self._lock:
+            if now >= self._next_sweep or len(self._expires) > self.max_keys:
+                self._sweep(now)
+            if rule.algorithm == TOKEN_BUCKET:
+                self._expires[key] = now + rule.window * rule.capacity / rule.limit
+                return self._token_bucket(key, rule, cost, now)
+            self._expires[key] = now - (now % rule.window) + 2 * rule.window
+            return self._sliding_window(key, rule, cost, now)
+
+    def _sweep(self, now: float) -> None:
+        expired = [key for key, expires in self._expires.items() if expires <= now]
+        live_count = len(self._expires) - len(expired)
+        if live_count > self.max_keys:
+            overflow = live_count - int(self.max_keys * self.trim_ratio)
+            live = ((expires, key) for key, expires in self._expires.items() if expires > now)
+            expired += [key for _, key in heapq.nsmallest(overflow, live)]
+        for key in expired:
+            self._drop(key)
+        self._next_sweep = now + self.sweep_interval
+
+    def _drop(self, key: str) -> None:
+        self._buckets.pop(key, None)
+        self._windows.pop(key, None)
+        self._expires.pop(key, None)
+
+    def _token_bucket(self, key: str, rule: RateLimit, cost: int, now: float) -> RateLimitResult:
+        rate = rule.limit / rule.window
+        tokens, updated = self._buckets.get(key, (float(rule.capacity), now))
+        tokens = min(float(rule.capacity), tokens + (now - updated) * rate)
+        allowed = tokens >= cost
+        if allowed:
+            tokens -= cost
+        self._buckets[key] = (tokens, now)
+        retry_after = 0.0 if allowed else (cost - tokens) / rate
+        return RateLimitResult(allowed, rule.capacity, int(tokens), retry_after)
+
+    def _sliding_window(self, key: str, rule: RateLimit, cost: int, now: float) -> RateLimitResult:
+        window_start = now - (now % rule.window)
+        start, current, previous = self._windows.get(key, (window_start, 0, 0))
+        if start != window_start:
+            previous = current if abs(window_start - start - rule.window) < 1e-6 else 0
+            current = 0
+        weight = 1 - (now - window_start) / rule.window
+        estimated = previous * weight + current
+        allowed = estimated + cost <= rule.limit
+        if allowed:
+            current += cost
+            estimated += cost
+        self._windows[key] = (window_start, current, previous)
+        retry_after = 0.0 if allowed else window_start + rule.window - now
+        return RateLimitResult(allowed, rule.limit, max(int(rule.limit - estimated), 0), retry_after)
+
+    def reset(self, key: str) -> None:
+        with self._lock:
+            self._drop(key)
+
+    def evict_idle(self, max_idle: float, now: Optional[float] = None) -> int:
+        """Drop state not touched for max_idle seconds; returns the number of keys removed"""
+        now = time.time() if now is None else now
+        with self._lock:
+            stale = [k for k, (_, updated) in self._buckets.items() if now - updated > max_idle]
+            stale += [k for k, (start, _, _) in self._windows.items() if now - start > max_idle]
+            for key in stale:
+                self._drop(key)
+        return len(stale)
+
+
+_TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local now = tonumber(ARGV[4])
+local ttl = tonumber(ARGV[5])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + (now - ts) * rate)
+local allowed = 0
+if tokens >= cost then
+  tokens = tokens - cost
+  allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], ttl)
+return {allowed, tostring(tokens)}
+"""
+
+_SLIDING_WINDOW_LUA = """
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local now = tonumber(ARGV[4])
+local window_start = now - (now % window)
+local current_key = KEYS[1] .. ':' .. tostring(window_start)
+local previous_key = KEYS[1] .. ':' .. tostring(window_start - window)
+local current = tonumber(redis.call('GET', current_key)) or 0
+local previous = tonumber(redis.call('GET', previous_key)) or 0
+local estimated = previous * (1 - (now - window_start) / window) + current
+local allowed = 0
+if estimated + cost <= limit then
+  redis.call('INCRBY', current_key, cost)
+  redis.call('EXPIRE', current_key, math.ceil(window * 2))
+  estimated = estimated + cost
+  allowed = 1
+end
+return {allowed, tostring(estimated), tostring(window_start)}
+"""
+
+
+class RedisBackend(RateLimitBackend):
+    """Shared backend for any client exposing redis-py's eval/delete/scan_iter (Redis, KeyDB, Valkey)"""
+
+    def __init__(self, client: Any):
+        self.client = client
+
+    def hit(self, key: str, rule: RateLimit, cost: int, now: float) -> RateLimitResult:
+        if rule.algorithm == TOKEN_BUCKET:
+            rate = rule.limit / rule.window
+            ttl = int(rule.capacity / rate) + 1
+            allowed, tokens = self.client.eval(
+                _TOKEN_BUCKET_LUA, 1, key, rule.capacity, rate, cost, now, ttl
+            )
+            tokens = float(tokens)
+            retry_after = 0.0 if allowed else (cost - tokens) / rate
+            return RateLimitResult(bool(allowed), rule.capacity, int(tokens), retry_after)
+
+        allowed, estimated, window_start = self.client.eval(
+            _SLIDING_WINDOW_LUA, 1, key, rule.limit, rule.window, cost, now
+        )
+        estimated = float(estimated)
+        retry_after = 0.0 if allowed else float(window_start) + rule.window - now
+        return RateLimitResult(bool(allowed), rule.limit, max(int(rule.limit - estimated), 0), retry_after)
+
+    def reset(self, key: str) -> None:
+        self.client.delete(key, *self.client.scan_iter(match=f"{key}:*"))
+
+
+class RateLimiter:
+    """
+    Rate limiter keyed by utils.rate_limit_key(identifier, action).
+
+    Allowed hits are counted per (identifier, action, window start) and handed
+    to `sink` every `sync_interval` seconds as rows shaped like the rate_limits
+    table, so Postgres keeps an audit trail without a write per request.
+
+    Each row's count is the delta since the previous sync, and a window spans
+    many syncs, so sinks must add counts to existing rows rather than insert
+    or overwrite them; see postgres_usage_sink.
+    """
+
+    def __init__(
+        self,
+        backend: Optional[RateLimitBackend] = None,
+        sink: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+        sync_interval: float = 60.0,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.backend = backend or MemoryBackend()
+        self.sink = sink
+        self.sync_interval = sync_interval
+        self.clock = clock
+        self._usage: Dict[Tuple[str, str, float], int] = defaultdict(int)
+        self._usage_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sync_thread: Optional[threading.Thread] = None
+        if sink is not None and sync_interval > 0:
+            self._sync_thread = threading.Thread(target=self._sync_loop, name="rate-limit-sync", daemon=True)
+            self._sync_thread.start()
+
+    def hit(self, identifier: str, action: str, rule: RateLimit, cost: int = 1) -> RateLimitResult:
+        """Consume `cost` units for identifier/action and report whether it was allowed"""
+        now = self.clock()
+        result = self.backend.hit(rate_limit_key(identifier, action), rule, cost, now)
+        if result.allowed and self.sink is not None:
+            window_start = now - (now % rule.window)
+            with self._usage_lock:
+                self._usage[(identifier, action, window_start)] += cost
+        return result
+
+    def check(self, identifier: str, action: str, max_requests: int, window_minutes: int = 60) -> bool:
+        """Drop-in replacement for the check_rate_limit(action, max_requests, window_minutes) RPC"""
+        return self.hit(identifier, action, RateLimit.per_minutes(max_requests, window_minutes)).allowed
+
+    def reset(self, identifier: str, action: str) -> None:
+        """Clear limiter state for identifier/action"""
+        self.backend.reset(rate_limit_key(identifier, action))
+
+    def sync(self) -> int:
+        """Flush accumulated usage to the sink; returns the number of rows written"""
+        with self._usage_lock:
+            usage, self._usage = self._usage, defaultdict(int)
+        if not usage or self.sink is None:
+            return 0
+        rows = [
+            {
+                "user_id": identifier,
+                "action": action,
+                "window_start": datetime.fromtimestamp(window_start, tz=timezone.utc).isoformat(),
+                "count": count,
+            }
+            for (identifier, action, window_start), count in usage.items()
+        ]
+        try:
+            self.sink(rows)
+        except Exception:
+            # Put the counts back so the next sync retries them
+            with self._usage_lock:
+                for (identifier, action, window_start), count in usage.items():
+                    self._usage[(identifier, action, window_start)] += count
+            raise
+        return len(rows)
+
+    def _sync_loop(self) -> None:
+        while not self._stop.wait(self.sync_interval):
+            try:
+                self.sync()
+            except Exception as e:
+                logger.warning("Rate limit usage sync failed: %s", e)
+
+    def close(self) -> None:
+        """Stop background syncing and flush remaining usage"""
+        self._stop.set()
+        if self._sync_thread is not None:
+            self._sync_thread.join()
+        if self.sink is not None:
+            self.sync()
+
+
+_UPSERT_USAGE_SQL = """
+INSERT INTO rate_limits (user_id, action, window_start, count)
+VALUES (CAST(:user_id AS uuid), :action, CAST(:window_start AS timestamptz), :count)
+ON CONFLICT (user_id, action, window_start) DO UPDATE SET count = rate_limits.count + EXCLUDED.count
+"""
+
+
+def _is_uuid(value: str) -> bool:
+    try:
+        uuid.UUID(value)
+    except (ValueError, AttributeError, TypeError):
+        return False
+    return True
+
+
+def postgres_usage_sink(engine: Any) -> Callable[[List[Dict[str, Any]]], None]:
+    """
+    Sink for RateLimiter that adds synced counts into rate_limits with one upsert.
+
+    rate_limits.user_id references profiles, so rows for IP or anonymous
+    identifiers are skipped; keep those limits in the backend only.
+    """
+    from sqlalchemy import text
+
+    statement = text(_UPSERT_USAGE_SQL)
+
+    def sink(rows: List[Dict[str, Any]]) -> None:
+        user_rows = [row for row in rows if _is_uuid(row["user_id"])]
+        if len(user_rows) < len(rows):
+            logger.debug("Skipped %d rate limit row(s) without a user id", len(rows) - len(user_rows))
+        if user_rows:
+            with engine.begin() as conn:
+                conn.execute(statement, user_rows)
+
+    return sink
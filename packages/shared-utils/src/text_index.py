@@ -0,0 +1,337 @@
+"""
+Zenith Text Index
+In-process inverted index with BM25 or TF-IDF scoring over content titles,
+tags and descriptions and profile bios. Supports incremental add/remove and
+heap-based top-k queries, and persists to a file that workers memory-map and
+share instead of each rebuilding the index on startup.
+"""
+
+import heapq
+import math
+import mmap
+import os
+import re
+import struct
+import tempfile
+from array import array
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from codec import dumps, loads
+
+# Conditional imports for optional dependencies
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+WORD_PATTERN = re.compile(r"\w+")
+
+# Per-field term weights for fields passed as a dict
+FIELD_WEIGHTS: Dict[str, float] = {
+    "title": 2.0,
+    "full_name": 2.0,
+    "tags": 1.5,
+    "description": 1.0,
+    "bio": 1.0,
+}
+
+INDEX_MAGIC = b"ZTI1"
+_PREAMBLE = struct.Struct("<4sI")
+
+DocId = Union[str, int]
+Fields = Union[str, Dict[str, Optional[str]]]
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens of a text"""
+    return WORD_PATTERN.findall(text.lower())
+
+
+def _term_frequencies(fields: Fields) -> Counter:
+    if isinstance(fields, str):
+        return Counter(tokenize(fields))
+    frequencies: Counter = Counter()
+    for name, text in fields.items():
+        if not text:
+            continue
+        weight = FIELD_WEIGHTS.get(name, 1.0)
+        for token in tokenize(text):
+            frequencies[token] += weight
+    return frequencies
+
+
+class _MappedSegment:
+    """Read-only postings of a saved index, memory-mapped so worker processes share the pages"""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, header_size = _PREAMBLE.unpack_from(self._mmap, 0)
+        if magic != INDEX_MAGIC:
+            raise ValueError(f"{path} is not a text index file")
+        header = loads(self._mmap[_PREAMBLE.size:_PREAMBLE.size + header_size])
+        self.params: Dict[str, float] = header["params"]
+        self.doc_ids: List[Optional[DocId]] = header["doc_ids"]
+        self.terms: Dict[str, List[int]] = header["terms"]
+        self.total_length: float = header["total_length"]
+        data = memoryview(self._mmap)[header["data_offset"]:]
+        doc_count = len(self.doc_ids)
+        postings_count = header["postings_count"]
+        self.doc_lengths = data[:doc_count * 4].cast("f")
+        slots_start = doc_count * 4
+        self._slots = data[slots_start:slots_start + postings_count * 4].cast("i")
+        self._tfs = data[slots_start + postings_count * 4:slots_start + postings_count * 8].cast("f")
+
+    def postings(self, term: str) -> Tuple[memoryview, memoryview]:
+        offset, count = self.terms.get(term, (0, 0))
+        return self._slots[offset:offset + count], self._tfs[offset:offset + count]
+
+    def close(self) -> None:
+        for view in (self.doc_lengths, self._slots, self._tfs):
+            view.release()
+        self._mmap.close()
+
+
+class TextIndex:
+    """
+    Inverted index with BM25 (default) or TF-IDF scoring.
+
+    Documents are plain text or a dict of named fields weighted by
+    FIELD_WEIGHTS. An index opened with load() keeps its saved postings
+    memory-mapped and applies later adds and removes in memory; document
+    frequencies count removed saved documents until the next save().
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._base: Optional[_MappedSegment] = None
+        self._postings: Dict[str, Dict[int, float]] = {}
+        self._doc_ids: List[Optional[DocId]] = []
+        self._doc_lengths: List[float] = []
+        self._doc_terms: Dict[int, Tuple[str, ...]] = {}
+        self._slots: Dict[DocId, int] = {}
+        self._removed_base: Set[int] = set()
+        self._total_length = 0.0
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __contains__(self, doc_id: DocId) -> bool:
+        return doc_id in self._slots
+
+    @property
+    def average_length(self) -> float:
+        return self._total_length / len(self._slots) if self._slots else 0.0
+
+    def _doc_length(self, slot: int) -> float:
+        base = self._base
+        if base is not None and slot < len(base.doc_ids):
+            return base.doc_lengths[slot]
+        return self._doc_lengths[slot - self._base_size]
+
+    @property
+    def _base_size(self) -> int:
+        return len(self._base.doc_ids) if self._base is not None else 0
+
+    def add(self, doc_id: DocId, fields: Fields) -> None:
+        """Add or replace a document"""
+        if doc_id in self._slots:
+            self.remove(doc_id)
+        frequencies = _term_frequencies(fields)
+        slot = self._base_size + len(self._doc_ids)
+        length = float(sum(frequencies.values()))
+        self._doc_ids.append(doc_id)
+        self._doc_lengths.append(length)
+        self._doc_terms[slot] = tuple(frequencies)
+        self._slots[doc_id] = slot
+        self._total_length += length
+        for term, tf in frequencies.items():
+            self._postings.setdefault(term, {})[slot] = tf
+
+    def add_many(self, documents: Iterable[Tuple[DocId, Fields]]) -> None:
+        """Add many (doc_id, fields) pairs"""
+        for doc_id, fields in documents:
+            self.add(doc_id, fields)
+
+    def remove(self, doc_id: DocId) -> None:
+        """Remove a document"""
+        slot = self._slots.pop(doc_id)
+        self._total_length -= self._doc_length(slot)
+        if slot < self._base_size:
+            self._removed_base.add(slot)
+            return
+        for term in self._doc_terms.pop(slot):
+            posting = self._postings[term]
+            del posting[slot]
+            if not posting:
+                del self._postings[term]
+        self._doc_ids[slot - self._base_size] = None
+
+    def _document_frequency(self, term: str) -> int:
+        frequency = len(self._postings.get(term, ()))
+        if self._base is not None:
+            frequency += self._base.terms.get(term, (0, 0))[1]
+        return frequency
+
+    def _weight(self, term: str, scoring: str) -> float:
+        doc_count = len(self._slots) + len(self._removed_base)
+        df = self._document_frequency(term)
+        if scoring == "tfidf":
+            return math.log(1 + doc_count / df)
+        return math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+
+    def scores(self, query: str, scoring: str = "bm25") -> Dict[int, float]:
+        """Scores by slot for every document containing a query term"""
+        if scoring not in ("bm25", "tfidf"):
+            raise ValueError(f"Unknown scoring '{scoring}'")
+        k1, b = self.k1, self.b
+        average = self.average_length or 1.0
+        scores: Dict[int, float] = {}
+        base = self._base
+        for term, query_tf in Counter(tokenize(query)).items():
+            if not self._document_frequency(term):
+                continue
+            weight = self._weight(term, scoring) * query_tf
+            if base is not None:
+                slots, tfs = base.postings(term)
+                if len(slots):
+                    self._accumulate_base(scores, slots, tfs, weight, scoring, average)
+            for slot, tf in self._postings.get(term, {}).items():
+                if scoring == "tfidf":
+                    value = (1 + math.log(tf)) if tf >= 1 else tf
+                else:
+                    length = self._doc_lengths[slot - self._base_size]
+                    value = tf * (k1 + 1) / (tf + k1 * (1 - b + b * length / average))
+                scores[slot] = scores.get(slot, 0.0) + weight * value
+        for slot in self._removed_base:
+            scores.pop(slot, None)
+        return scores
+
+    def _accumulate_base(self, scores: Dict[int, float], slots: memoryview, tfs: memoryview,
+                         weight: float, scoring: str, average: float) -> None:
+        k1, b = self.k1, self.b
+        if NUMPY_AVAILABLE:
+            slot_array = np.frombuffer(slots, dtype=np.int32)
+            tf_array = np.frombuffer(tfs, dtype=np.float32).astype(np.float64)
+            if scoring == "tfidf":
+                values = np.where(tf_array >= 1, 1 + np.log(np.maximum(tf_array, 1)), tf_array)
+            else:
+                lengths = np.frombuffer(self._base.doc_lengths, dtype=np.float32)[slot_array]
+                values = tf_array * (k1 + 1) / (tf_array + k1 * (1 - b + b * lengths / average))
+            for slot, value in zip(slot_array.tolist(), (values * weight).tolist()):
+                scores[slot] = scores.get(slot, 0.0) + value
+            return
+        lengths = self._base.doc_lengths
+        for slot, tf in zip(slots, tfs):
+            if scoring == "tfidf":
+                value = (1 + math.log(tf)) if tf >= 1 else tf
+            else:
+                value = tf * (k1 + 1) / (tf + k1 * (1 - b + b * lengths[slot] / average))
+            scores[slot] = scores.get(slot, 0.0) + weight * value
+
+    def _doc_id(self, slot: int) -> Optional[DocId]:
+        if slot < self._base_size:
+            return self._base.doc_ids[slot]
+        return self._doc_ids[slot - self._base_size]
+
+    def search(self, query: str, k: int = 10, scoring: str = "bm25") -> List[Tuple[DocId, float]]:
+        """Top-k (doc_id, score) pairs for a query, best first"""
+        scores = self.scores(query, scoring)
+        top = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+        return [(self._doc_id(slot), score) for slot, score in top]
+
+    def save(self, path: str) -> None:
+        """
+        Write the index, compacting removed documents, atomically replacing path.
+
+        Other processes pick it up with TextIndex.load(path).
+        """
+        doc_ids: List[DocId] = []
+        lengths = array("f")
+        remap: Dict[int, int] = {}
+        for doc_id, slot in sorted(self._slots.items(), key=lambda item: item[1]):
+            remap[slot] = len(doc_ids)
+            doc_ids.append(doc_id)
+            lengths.append(self._doc_length(slot))
+
+        merged: Dict[str, List[Tuple[int, float]]] = {}
+        if self._base is not None:
+            for term in self._base.terms:
+                slots, tfs = self._base.postings(term)
+                entries = [(remap[slot], tf) for slot, tf in zip(slots, tfs) if slot in remap]
+                if entries:
+                    merged[term] = entries
+        for term, posting in self._postings.items():
+            merged.setdefault(term, []).extend((remap[slot], tf) for slot, tf in posting.items())
+
+        slot_data = array("i")
+        tf_data = array("f")
+        terms: Dict[str, List[int]] = {}
+        for term, entries in merged.items():
+            terms[term] = [len(slot_data), len(entries)]
+            for slot, tf in entries:
+                slot_data.append(slot)
+                tf_data.append(tf)
+
+        header = {
+            "params": {"k1": self.k1, "b": self.b},
+            "doc_ids": doc_ids,
+            "terms": terms,
+            "total_length": self._total_length,
+            "postings_count": len(slot_data),
+        }
+        # data_offset depends on the header's own size; pad so arrays start 4-byte aligned
+        header["data_offset"] = 0
+        size = _PREAMBLE.size + len(dumps(header)) + 16
+        header["data_offset"] = size + (-size % 4)
+        encoded = dumps(header)
+        padding = header["data_offset"] - _PREAMBLE.size - len(encoded)
+
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".text-index-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(_PREAMBLE.pack(INDEX_MAGIC, len(encoded)))
+                f.write(encoded)
+                f.write(b" " * padding)
+                f.write(lengths.tobytes())
+                f.write(slot_data.tobytes())
+                f.write(tf_data.tobytes())
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path: str) -> "TextIndex":
+        """Open a saved index with its postings memory-mapped"""
+        base = _MappedSegment(path)
+        index = cls(k1=base.params["k1"], b=base.params["b"])
+        index._base = base
+        index._slots = {doc_id: slot for slot, doc_id in enumerate(base.doc_ids)}
+        index._total_length = base.total_length
+        return index
+
+    def close(self) -> None:
+        """Release the memory-mapped file of a loaded index"""
+        if self._base is not None:
+            self._base.close()
+            self._base = None
+
+
+def content_fields(content: Any) -> Dict[str, Optional[str]]:
+    """Indexable fields of a ContentMetadata"""
+    return {"title": content.title, "tags": " ".join(content.tags or []), "description": content.description}
+
+
+def profile_fields(full_name: Optional[str], bio: Optional[str]) -> Dict[str, Optional[str]]:
+    """Indexable fields of a user profile"""
+    return {"full_name": full_name, "bio": bio}
+
+
+def index_content(index: TextIndex, items: Iterable[Any]) -> None:
+    """Add ContentMetadata items to an index under their ids"""
+    index.add_many((item.id, content_fields(item)) for item in items)
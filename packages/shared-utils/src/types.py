@@ -3,11 +3,29 @@ Zenith Shared Types and Interfaces
 Common types, interfaces, and utilities used across all services
 """
 
-from typing import Dict, List, Optional, Any, Union
+import dataclasses
+import logging
+import os
+import random
+import time
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Optional, Any, Tuple, Type, TypeVar, Union, get_args
 from datetime import datetime
 from pydantic import BaseModel, Field
 from enum import Enum
 
+from codec import dump_model
+from validation import validate_email as _validate_email, validate_phone_basic
+
+# Conditional imports for optional dependencies
+try:
+    import msgspec
+    MSGSPEC_AVAILABLE = True
+except ImportError:
+    MSGSPEC_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
 # Common Enums
 class UserRole(str, Enum):
     USER = "user"
@@ -60,6 +78,10 @@ class APIResponse(BaseModel):
     data: Optional[Any] = None
     errors: Optional[List[str]] = None
 
+    def to_json_bytes(self) -> bytes:
+        """Serialize to JSON bytes for direct response writes"""
+        return dump_model(self)
+
 class PaginatedResponse(APIResponse):
     """Paginated API response"""
     total: int
@@ -67,6 +89,15 @@ class PaginatedResponse(APIResponse):
     per_page: int
     pages: int
 
+class CursorPage(APIResponse):
+    """Cursor-paginated API response; no exact total required"""
+    limit: int
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+    has_next: bool = False
+    has_prev: bool = False
+    estimated_total: Optional[int] = None
+
 class ErrorResponse(APIResponse):
     """Error response"""
     success: bool = False
@@ -78,6 +109,12 @@ class PaginationParams(BaseModel):
     page: int = Field(default=1, ge=1)
     per_page: int = Field(default=20, ge=1, le=100)
 
+class CursorParams(BaseModel):
+    """Cursor (keyset) pagination parameters"""
+    cursor: Optional[str] = None
+    limit: int = Field(default=20, ge=1, le=100)
+    include_estimate: bool = False
+
 class SortParams(BaseModel):
     """Sorting parameters"""
     sort_by: Optional[str] = None
@@ -141,6 +178,203 @@ class PaymentData(BaseModel):
     created_at: datetime
     completed_at: Optional[datetime] = None
 
+# Compact structs for hot paths (feed pages, notification fan-out).
+# msgspec Structs when msgspec is installed, slotted dataclasses otherwise;
+# pydantic validation happens only when converting at the edge.
+def _define_struct(model: Type[BaseModel]) -> type:
+    """Build a compact struct type with the same fields and defaults as a pydantic model"""
+    spec = []
+    for name, info in model.model_fields.items():
+        if info.is_required():
+            spec.append((name, info.annotation))
+        elif info.default_factory is not None:
+            factory = msgspec.field if MSGSPEC_AVAILABLE else dataclasses.field
+            spec.append((name, info.annotation, factory(default_factory=info.default_factory)))
+        elif MSGSPEC_AVAILABLE:
+            spec.append((name, info.annotation, info.default))
+        else:
+            spec.append((name, info.annotation, dataclasses.field(default=info.default)))
+    name = f"{model.__name__}Struct"
+    if MSGSPEC_AVAILABLE:
+        # Fields hold only scalars and plain containers, so GC tracking is skipped
+        return msgspec.defstruct(name, spec, kw_only=True, gc=False, module=__name__)
+    struct = dataclasses.make_dataclass(name, spec, slots=True, kw_only=True)
+    struct.__module__ = __name__
+    return struct
+
+UserProfileStruct = _define_struct(UserProfile)
+ContentMetadataStruct = _define_struct(ContentMetadata)
+NotificationDataStruct = _define_struct(NotificationData)
+PaymentDataStruct = _define_struct(PaymentData)
+
+STRUCT_TYPES: Dict[type, type] = {
+    UserProfile: UserProfileStruct,
+    ContentMetadata: ContentMetadataStruct,
+    NotificationData: NotificationDataStruct,
+    PaymentData: PaymentDataStruct,
+}
+_MODEL_TYPES: Dict[type, type] = {struct: model for model, struct in STRUCT_TYPES.items()}
+_STRUCT_FIELDS: Dict[type, Tuple[str, ...]] = {
+    struct: tuple(model.model_fields) for model, struct in STRUCT_TYPES.items()
+}
+
+def to_struct(model: BaseModel) -> Any:
+    """Convert a shared model to its compact struct without re-validating"""
+    struct_type = STRUCT_TYPES[type(model)]
+    return struct_type(**{name: getattr(model, name) for name in _STRUCT_FIELDS[struct_type]})
+
+def to_structs(models: Iterable[BaseModel]) -> List[Any]:
+    """Convert many shared models to compact structs"""
+    return [to_struct(model) for model in models]
+
+def struct_to_dict(struct: Any) -> Dict[str, Any]:
+    """Plain dict of a struct's fields"""
+    return {name: getattr(struct, name) for name in _STRUCT_FIELDS[type(struct)]}
+
+def from_struct(struct: Any, validate: bool = True) -> BaseModel:
+    """Convert a compact struct back to its shared model; validate=False trusts the struct"""
+    model_type = _MODEL_TYPES[type(struct)]
+    data = struct_to_dict(struct)
+    if validate:
+        return model_type.model_validate(data)
+    return model_type.model_construct(**data)
+
+def struct_from_dict(struct_type: type, data: Dict[str, Any], validate: bool = False) -> Any:
+    """
+    Build a struct from a dict such as a DB row.
+
+    validate=True checks and coerces values (msgspec.convert, or the
+    pydantic model without msgspec); the default trusts the data.
+    """
+    if not validate:
+        return struct_type(**data)
+    if MSGSPEC_AVAILABLE:
+        return msgspec.convert(data, struct_type, from_attributes=True)
+    return to_struct(_MODEL_TYPES[struct_type].model_validate(data))
+
+def benchmark_structs(count: int = 10000) -> Dict[str, Dict[str, float]]:
+    """Construction time (ms) and retained bytes per instance for NotificationData vs. its struct"""
+    import tracemalloc
+
+    now = datetime.utcnow()
+    rows = [
+        {"id": f"n-{i}", "user_id": f"u-{i % 100}", "type": NotificationType.INFO, "title": "New message",
+         "message": "You have a new message", "is_read": bool(i % 2), "created_at": now}
+        for i in range(count)
+    ]
+
+    def measure(build: Callable[[Dict[str, Any]], Any]) -> Dict[str, float]:
+        start = time.perf_counter()
+        [build(row) for row in rows]
+        construct_ms = (time.perf_counter() - start) * 1000
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        kept = [build(row) for row in rows]
+        retained = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+        del kept
+        return {"construct_ms": construct_ms, "bytes_per_instance": retained / count}
+
+    return {
+        "model": measure(lambda row: NotificationData(**row)),
+        "model_construct": measure(lambda row: NotificationData.model_construct(**row)),
+        "struct": measure(lambda row: NotificationDataStruct(**row)),
+    }
+
+# Trusted construction of compact structs from rows in our own database.
+# Skips pydantic validation; ZENITH_TRUSTED_SAMPLE_RATE (or sample_rate)
+# re-validates a fraction of rows to catch schema drift.
+TRUSTED_SAMPLE_RATE = float(os.getenv("ZENITH_TRUSTED_SAMPLE_RATE", "0"))
+
+StructT = TypeVar("StructT")
+
+class RowDriftError(ValueError):
+    """Raised when a trusted row lacks required fields or a sampled one doesn't match its validated model"""
+
+_UNSET = object()
+
+@lru_cache(maxsize=None)
+def _construction_plan(model: Type[BaseModel]):
+    """Field names, defaults template (in field order), default factories and enum lookups for a model"""
+    template: Dict[str, Any] = {}
+    factories: Dict[str, Callable[[], Any]] = {}
+    enums: Dict[str, Dict[Any, Enum]] = {}
+    for name, info in model.model_fields.items():
+        template[name] = _UNSET if info.is_required() or info.default_factory is not None else info.default
+        if info.default_factory is not None:
+            factories[name] = info.default_factory
+        for candidate in (info.annotation, *get_args(info.annotation)):
+            if isinstance(candidate, type) and issubclass(candidate, Enum):
+                enums[name] = candidate._value2member_map_
+    return tuple(template), frozenset(template), template, factories, tuple(enums.items())
+
+def _row_values(row: Any, names: Tuple[str, ...]) -> Dict[str, Any]:
+    """Model fields present in a dict, SQLAlchemy Row or ORM object"""
+    mapping = getattr(row, "_mapping", row)
+    if hasattr(mapping, "keys"):
+        return {name: mapping[name] for name in names if name in mapping}
+    values = {name: getattr(row, name, _UNSET) for name in names}
+    return {name: value for name, value in values.items() if value is not _UNSET}
+
+def from_rows(
+    model: Type[StructT],
+    rows: Iterable[Any],
+    sample_rate: Optional[float] = None,
+    raise_on_drift: bool = False,
+) -> List[StructT]:
+    """
+    Build compact structs (e.g. UserProfileStruct) from trusted DB rows
+    (dicts, SQLAlchemy Rows or ORM objects) without pydantic validation.
+
+    Defaults are filled in and enum fields are mapped from their stored
+    values. Rows missing a required field raise RowDriftError. A
+    sample_rate fraction of rows is also validated against the pydantic
+    model; mismatches are logged, or raised as RowDriftError with
+    raise_on_drift=True. Pydantic models are rejected; use model_validate.
+    """
+    pydantic_model = _MODEL_TYPES.get(model)
+    if pydantic_model is None:
+        raise TypeError(f"from_rows builds structs only; use {model.__name__}.model_validate for pydantic models")
+    names, name_set, template, factories, enums = _construction_plan(pydantic_model)
+    rate = TRUSTED_SAMPLE_RATE if sample_rate is None else sample_rate
+    results: List[StructT] = []
+    for index, row in enumerate(rows):
+        if type(row) is dict and row.keys() <= name_set:
+            values = row
+        else:
+            values = _row_values(row, names)
+        data = {**template, **values}
+        if len(values) < len(names):
+            missing = [name for name in names if data[name] is _UNSET and name not in factories]
+            if missing:
+                raise RowDriftError(
+                    f"Trusted {pydantic_model.__name__} row {index} is missing required fields: {', '.join(missing)}"
+                )
+            for name, factory in factories.items():
+                if data[name] is _UNSET:
+                    data[name] = factory()
+        for name, members in enums:
+            value = data.get(name)
+            if value is not None:
+                data[name] = members.get(value, value)
+        instance = model(**data)
+        if rate and random.random() < rate:
+            _check_drift(pydantic_model, values, data, index, raise_on_drift)
+        results.append(instance)
+    return results
+
+def _check_drift(model: Type[BaseModel], values: Dict[str, Any], data: Dict[str, Any], index: int, raise_on_drift: bool) -> None:
+    try:
+        problem = None if model.model_validate(values).__dict__ == data else "fields differ after validation"
+    except ValueError as e:
+        problem = str(e)
+    if problem is None:
+        return
+    message = f"Trusted {model.__name__} row {index} drifted from the model: {problem}"
+    if raise_on_drift:
+        raise RowDriftError(message)
+    logger.warning(message)
+
 # Common utility functions
 def generate_id() -> str:
     """Generate a unique ID"""
@@ -157,15 +391,11 @@ def format_datetime(dt: datetime) -> str:
 
 def validate_email(email: str) -> bool:
     """Basic email validation"""
-    import re
-    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    return bool(re.match(pattern, email))
+    return _validate_email(email)
 
 def validate_phone(phone: str) -> bool:
     """Basic phone validation"""
-    import re
-    pattern = r'^\+?1?[-.\s]?\(?([0-9]{3})\)?[-.\s]?([0-9]{3})[-.\s]?([0-9]{4})$'
-    return bool(re.match(pattern, phone))
+    return validate_phone_basic(phone)
 
 # Constants
 DEFAULT_PAGE_SIZE = 20
@@ -7,18 +7,24 @@ import hashlib
 import hmac
 import secrets
 import string
-from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional, Union
-import json
-import re
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
 
 # Conditional imports for optional dependencies
 try:
+    from passlib.context import CryptContext
     from passlib.hash import bcrypt
     BCRYPT_AVAILABLE = True
 except ImportError:
     BCRYPT_AVAILABLE = False
 
+try:
+    import argon2
+    ARGON2_AVAILABLE = True
+except ImportError:
+    ARGON2_AVAILABLE = False
+
 try:
     from cryptography.fernet import Fernet
     FERNET_AVAILABLE = True
@@ -32,10 +38,22 @@ except ImportError:
     QRCODE_AVAILABLE = False
 
 try:
-    import phonenumbers
-    PHONENUMBERS_AVAILABLE = True
+    import numpy as np
+    NUMPY_AVAILABLE = True
 except ImportError:
-    PHONENUMBERS_AVAILABLE = False
+    NUMPY_AVAILABLE = False
+
+from codec import dumps, dumps_str, get_codec
+from similarity import jaccard, tokenize
+
+# Validators live in validation.py with precompiled patterns; re-exported here
+from validation import (
+    PHONENUMBERS_AVAILABLE,
+    generate_slug,
+    sanitize_html,
+    validate_email,
+    validate_phone,
+)
 
 def generate_secure_token(length: int = 32) -> str:
     """Generate a secure random token"""
@@ -45,17 +63,78 @@ def generate_api_key() -> str:
     """Generate an API key"""
     return f"zk_{secrets.token_urlsafe(32)}"
 
+_password_context = None
+_password_settings: Dict[str, Any] = {}
+
+def configure_password_hashing(
+    scheme: str = "bcrypt",
+    bcrypt_rounds: Optional[int] = None,
+    argon2_time_cost: int = 3,
+    argon2_memory_cost: int = 65536,
+    argon2_parallelism: int = 2,
+) -> None:
+    """Select the password hash scheme and cost; hashes made with other settings are flagged for rehash"""
+    global _password_context, _password_settings
+    if not BCRYPT_AVAILABLE:
+        raise ImportError("passlib is required for password hashing")
+    settings: Dict[str, Any] = {}
+    if bcrypt_rounds is not None:
+        settings["bcrypt__rounds"] = bcrypt_rounds
+    if scheme == "argon2id":
+        if not ARGON2_AVAILABLE:
+            raise ImportError("argon2-cffi is required for argon2id hashing")
+        schemes = ["argon2", "bcrypt"]
+        settings.update(
+            argon2__type="ID",
+            argon2__time_cost=argon2_time_cost,
+            argon2__memory_cost=argon2_memory_cost,
+            argon2__parallelism=argon2_parallelism,
+        )
+    elif scheme == "bcrypt":
+        schemes = ["bcrypt", "argon2"] if ARGON2_AVAILABLE else ["bcrypt"]
+    else:
+        raise ValueError(f"Unsupported password hash scheme: {scheme}")
+    _password_context = CryptContext(schemes=schemes, deprecated="auto", **settings)
+    _password_settings = {
+        "scheme": scheme,
+        "bcrypt_rounds": bcrypt_rounds,
+        "argon2_time_cost": argon2_time_cost,
+        "argon2_memory_cost": argon2_memory_cost,
+        "argon2_parallelism": argon2_parallelism,
+    }
+
+def get_password_hashing_settings() -> Dict[str, Any]:
+    """Arguments of the last configure_password_hashing call; empty if it hasn't run"""
+    return dict(_password_settings)
+
+def _get_password_context():
+    if _password_context is None:
+        configure_password_hashing()
+    return _password_context
+
 def hash_password(password: str) -> str:
-    """Hash a password using bcrypt"""
+    """Hash a password using the configured scheme (bcrypt by default)"""
     if not BCRYPT_AVAILABLE:
         raise ImportError("bcrypt is required for password hashing")
-    return bcrypt.hash(password)
+    return _get_password_context().hash(password)
 
 def verify_password(password: str, hashed: str) -> bool:
     """Verify a password against its hash"""
     if not BCRYPT_AVAILABLE:
         raise ImportError("bcrypt is required for password verification")
-    return bcrypt.verify(password, hashed)
+    return _get_password_context().verify(password, hashed)
+
+def verify_and_update_password(password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    """Verify a password; on success also return a new hash if the stored one uses outdated settings"""
+    if not BCRYPT_AVAILABLE:
+        raise ImportError("bcrypt is required for password verification")
+    return _get_password_context().verify_and_update(password, hashed)
+
+def password_needs_rehash(hashed: str) -> bool:
+    """Check whether a stored hash uses a deprecated scheme or cost"""
+    if not BCRYPT_AVAILABLE:
+        raise ImportError("bcrypt is required for password verification")
+    return _get_password_context().needs_update(hashed)
 
 def generate_otp_secret() -> str:
     """Generate a TOTP secret"""
@@ -78,62 +157,33 @@ def verify_backup_code(hashed_code: str, provided_code: str) -> bool:
     """Verify a backup code against its hash"""
     return hmac.compare_digest(hashed_code, hash_backup_code(provided_code))
 
+@lru_cache(maxsize=64)
+def get_fernet(key: str) -> "Fernet":
+    """Get a cached Fernet instance for a key"""
+    if not FERNET_AVAILABLE:
+        raise ImportError("cryptography is required for data encryption")
+    return Fernet(key.encode())
+
 def encrypt_data(data: str, key: str) -> str:
     """Encrypt data using Fernet"""
     if not FERNET_AVAILABLE:
         raise ImportError("cryptography is required for data encryption")
-    f = Fernet(key.encode())
-    return f.encrypt(data.encode()).decode()
+    return get_fernet(key).encrypt(data.encode()).decode()
 
 def decrypt_data(encrypted_data: str, key: str) -> str:
     """Decrypt data using Fernet"""
     if not FERNET_AVAILABLE:
         raise ImportError("cryptography is required for data decryption")
-    f = Fernet(key.encode())
-    return f.decrypt(encrypted_data.encode()).decode()
+    return get_fernet(key).decrypt(encrypted_data.encode()).decode()
 
-def generate_qr_code(data: str) -> str:
-    """Generate QR code as base64 string"""
+def generate_qr_code(data: str, fmt: str = "png") -> str:
+    """Generate QR code as base64 string; see qr.render_qr_code(_async) for raw bytes"""
     if not QRCODE_AVAILABLE:
         raise ImportError("qrcode is required for QR code generation")
-    import qrcode
-    import io
     import base64
+    from qr import render_qr_code
 
-    qr = qrcode.QRCode(version=1, box_size=10, border=5)
-    qr.add_data(data)
-    qr.make(fit=True)
-    img = qr.make_image(fill_color="black", back_color="white")
-
-    buffer = io.BytesIO()
-    img.save(buffer, "PNG")
-    return base64.b64encode(buffer.getvalue()).decode()
-
-def validate_email(email: str) -> bool:
-    """Validate email format"""
-    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    return bool(re.match(pattern, email))
-
-def validate_phone(phone: str) -> bool:
-    """Validate phone number format"""
-    if PHONENUMBERS_AVAILABLE:
-        try:
-            import phonenumbers
-            parsed = phonenumbers.parse(phone)
-            return phonenumbers.is_valid_number(parsed)
-        except:
-            pass
-    # Fallback to basic validation
-    pattern = r'^\+?1?[-.\s]?\(?([0-9]{3})\)?[-.\s]?([0-9]{3})[-.\s]?([0-9]{4})$'
-    return bool(re.match(pattern, phone))
-
-def sanitize_html(text: str) -> str:
-    """Sanitize HTML content"""
-    # Basic HTML sanitization - remove script tags and dangerous attributes
-    text = re.sub(r'<script[^>]*>.*?</script>', '', text, flags=re.IGNORECASE | re.DOTALL)
-    text = re.sub(r'on\w+\s*=', '', text, flags=re.IGNORECASE)
-    text = re.sub(r'javascript:', '', text, flags=re.IGNORECASE)
-    return text
+    return base64.b64encode(render_qr_code(data, fmt)).decode()
 
 def truncate_text(text: str, max_length: int = 100, suffix: str = "...") -> str:
     """Truncate text to specified length"""
@@ -145,39 +195,138 @@ def format_currency(amount: float, currency: str = "USD") -> str:
     """Format currency amount"""
     return f"{currency} {amount:.2f}"
 
-def calculate_age(birth_date: datetime) -> int:
+def utc_now() -> datetime:
+    """Current time as a timezone-aware UTC datetime"""
+    return datetime.now(timezone.utc)
+
+def utc_today() -> date:
+    """Current UTC date"""
+    return utc_now().date()
+
+def calculate_age(birth_date: Union[date, datetime], today: Optional[date] = None) -> int:
     """Calculate age from birth date"""
-    today = datetime.utcnow()
+    today = today or utc_today()
     age = today.year - birth_date.year
     if today.month < birth_date.month or (today.month == birth_date.month and today.day < birth_date.day):
         age -= 1
     return age
 
-def is_adult(birth_date: datetime, min_age: int = 18) -> bool:
+def is_adult(birth_date: Union[date, datetime], min_age: int = 18, today: Optional[date] = None) -> bool:
     """Check if person is of adult age"""
-    return calculate_age(birth_date) >= min_age
-
-def generate_slug(text: str) -> str:
-    """Generate URL slug from text"""
-    text = text.lower()
-    text = re.sub(r'[^\w\s-]', '', text)
-    text = re.sub(r'[\s_-]+', '-', text)
-    return text.strip('-')
-
-def parse_json_safely(json_str: str, default: Any = None) -> Any:
+    return calculate_age(birth_date, today) >= min_age
+
+# Batch age filters. Age >= N is the same as being born on or before the
+# date N years before today, so filters reduce to one date comparison per
+# candidate against a cutoff computed once per reference date.
+@lru_cache(maxsize=256)
+def birth_date_cutoff(years: int, today: date) -> date:
+    """Latest birth date of someone at least `years` old on `today` (Feb 29 maps to Feb 28)"""
+    try:
+        return today.replace(year=today.year - years)
+    except ValueError:
+        return today.replace(year=today.year - years, day=28)
+
+def _as_date(value: Any) -> Optional[date]:
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, str):
+        return date.fromisoformat(value[:10])
+    return value
+
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+_NAT_DAYS = -(2 ** 63)
+
+def _epoch_days(value: Any) -> int:
+    value = _as_date(value)
+    return _NAT_DAYS if value is None else value.toordinal() - _EPOCH_ORDINAL
+
+def to_birth_date_array(birth_dates: Iterable[Any]) -> "np.ndarray":
+    """
+    Convert birth dates (dates, datetimes, ISO strings or None) to a
+    datetime64[D] array; missing values become NaT.
+
+    Keep the result, e.g. alongside a cached candidate list, so repeated
+    filters skip this conversion.
+    """
+    if not NUMPY_AVAILABLE:
+        raise ImportError("numpy is required for birth date arrays")
+    if isinstance(birth_dates, np.ndarray) and np.issubdtype(birth_dates.dtype, np.datetime64):
+        return birth_dates.astype("datetime64[D]")
+    # Day ordinals are far cheaper to collect than letting NumPy convert date objects
+    days = np.fromiter(map(_epoch_days, birth_dates), dtype=np.int64)
+    return days.view("datetime64[D]")
+
+def calculate_ages(birth_dates: Iterable[Any], today: Optional[date] = None) -> Union["np.ndarray", List[Optional[int]]]:
+    """
+    Ages for many birth dates against one reference date.
+
+    With NumPy returns an int array (-1 for missing dates); otherwise a list
+    with None for missing dates.
+    """
+    today = today or utc_today()
+    if not NUMPY_AVAILABLE:
+        return [None if value is None else calculate_age(_as_date(value), today) for value in birth_dates]
+    births = to_birth_date_array(birth_dates)
+    years = births.astype("datetime64[Y]").astype(np.int64) + 1970
+    months = births.astype("datetime64[M]")
+    month_day = (months.astype(np.int64) % 12 + 1) * 100 + (births - months).astype(np.int64) + 1
+    ages = today.year - years - (month_day > today.month * 100 + today.day)
+    return np.where(np.isnat(births), -1, ages)
+
+def age_mask(
+    birth_dates: Iterable[Any],
+    min_age: Optional[int] = None,
+    max_age: Optional[int] = None,
+    today: Optional[date] = None,
+) -> Union["np.ndarray", List[bool]]:
+    """
+    Which birth dates fall within [min_age, max_age] on the reference date.
+
+    Returns a boolean array with NumPy (a list otherwise); missing dates
+    never match.
+    """
+    today = today or utc_today()
+    earliest = birth_date_cutoff(max_age + 1, today) if max_age is not None else None
+    latest = birth_date_cutoff(min_age, today) if min_age is not None else None
+    if not NUMPY_AVAILABLE:
+        births = [_as_date(value) for value in birth_dates]
+        return [
+            birth is not None and (latest is None or birth <= latest) and (earliest is None or birth > earliest)
+            for birth in births
+        ]
+    births = to_birth_date_array(birth_dates)
+    mask = ~np.isnat(births)
+    if latest is not None:
+        mask &= births <= np.datetime64(latest, "D")
+    if earliest is not None:
+        mask &= births > np.datetime64(earliest, "D")
+    return mask
+
+def adult_mask(birth_dates: Iterable[Any], min_age: int = 18, today: Optional[date] = None) -> Union["np.ndarray", List[bool]]:
+    """Which birth dates belong to adults on the reference date"""
+    return age_mask(birth_dates, min_age=min_age, today=today)
+
+def parse_json_safely(json_str: Union[str, bytes], default: Any = None) -> Any:
     """Safely parse JSON string"""
+    codec = get_codec()
     try:
-        return json.loads(json_str)
-    except (json.JSONDecodeError, TypeError):
+        return codec.loads(json_str)
+    except codec.decode_errors:
         return default
 
 def serialize_to_json(data: Any) -> str:
     """Serialize data to JSON string"""
     try:
-        return json.dumps(data, default=str)
+        return dumps_str(data)
     except (TypeError, ValueError):
         return "{}"
 
+def serialize_to_json_bytes(data: Any) -> bytes:
+    """Serialize data to JSON bytes for writing straight to a response; raises on failure"""
+    return dumps(data)
+
 def get_file_extension(filename: str) -> str:
     """Get file extension from filename"""
     return filename.split('.')[-1].lower() if '.' in filename else ''
@@ -192,15 +341,8 @@ def generate_presigned_url(bucket: str, key: str, expiration: int = 3600) -> str
     return f"https://{bucket}.s3.amazonaws.com/{key}?expires={expiration}"
 
 def calculate_similarity(text1: str, text2: str) -> float:
-    """Calculate text similarity (simple implementation)"""
-    # This is a basic implementation - could be enhanced with ML models
-    words1 = set(text1.lower().split())
-    words2 = set(text2.lower().split())
-
-    intersection = words1.intersection(words2)
-    union = words1.union(words2)
-
-    return len(intersection) / len(union) if union else 0.0
+    """Calculate text similarity (word-set Jaccard); use similarity.SimilarityIndex for one-vs-many"""
+    return jaccard(tokenize(text1), tokenize(text2))
 
 def rate_limit_key(identifier: str, action: str) -> str:
     """Generate rate limit key"""
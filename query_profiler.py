@@ -0,0 +1,209 @@
+"""
+Per-statement query profiling for Zenith Microservices.
+Hooks SQLAlchemy cursor events to aggregate latency by normalized statement
+fingerprint and keeps a sampled slow-query log with EXPLAIN plans.
+"""
+import json
+import logging
+import random
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Statement normalization patterns, applied in order
+_COMMENT_RE = re.compile(r"--[^\n]*|/\*.*?\*/", re.DOTALL)
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_PARAM_RE = re.compile(r"%\(\w+\)s|%s|\$\d+|(?<![:\w]):\w+|\?")
+_NUMBER_RE = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_IN_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_VALUES_RE = re.compile(r"(VALUES\s*\(\?\))(?:\s*,\s*\(\?\))+", re.IGNORECASE)
+_WHITESPACE_RE = re.compile(r"\s+")
+_EXPLAINABLE_RE = re.compile(r"^\s*(SELECT|INSERT|UPDATE|DELETE|WITH)\b", re.IGNORECASE)
+
+
+def fingerprint(statement: str) -> str:
+    """Normalize a SQL statement so queries differing only in literals group together."""
+    text = _COMMENT_RE.sub(" ", statement)
+    text = _STRING_RE.sub("?", text)
+    text = _PARAM_RE.sub("?", text)
+    text = _NUMBER_RE.sub("?", text)
+    text = _IN_LIST_RE.sub("(?)", text)
+    text = _VALUES_RE.sub(r"\1", text)
+    return _WHITESPACE_RE.sub(" ", text).strip()
+
+
+class StatementStats:
+    """Latency and row-count aggregate for one statement fingerprint."""
+
+    def __init__(self, fingerprint: str, sample_size: int):
+        self.fingerprint = fingerprint
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+        self.samples: Deque[float] = deque(maxlen=sample_size)
+
+    def record(self, elapsed_ms: float, rows: int) -> None:
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        if rows > 0:
+            self.rows += rows
+        self.samples.append(elapsed_ms)
+
+    def percentile(self, q: float) -> float:
+        """Percentile over the most recent samples."""
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "fingerprint": self.fingerprint,
+            "count": self.count,
+            "total_ms": round(self.total_ms, 3),
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "p50_ms": round(self.percentile(0.50), 3),
+            "p95_ms": round(self.percentile(0.95), 3),
+            "p99_ms": round(self.percentile(0.99), 3),
+            "max_ms": round(self.max_ms, 3),
+            "rows": self.rows,
+        }
+
+
+class QueryProfiler:
+    """Aggregates cursor execution timings for every engine it is attached to."""
+
+    def __init__(
+        self,
+        slow_threshold_ms: float = 200.0,
+        sample_rate: float = 1.0,
+        explain: bool = True,
+        max_fingerprints: int = 2000,
+        sample_size: int = 1000,
+        slow_log_size: int = 200,
+    ):
+        self.slow_threshold_ms = slow_threshold_ms
+        self.sample_rate = sample_rate
+        self.explain = explain
+        self.max_fingerprints = max_fingerprints
+        self.sample_size = sample_size
+        self.enabled = True
+        self._stats: Dict[str, StatementStats] = {}
+        self._slow_log: Deque[Dict[str, Any]] = deque(maxlen=slow_log_size)
+        self._lock = threading.Lock()
+
+    def attach(self, engine: Engine) -> None:
+        """Register cursor execution listeners on a (sync) engine."""
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("query_start_time")
+        if not starts:
+            return
+        elapsed_ms = (time.perf_counter() - starts.pop()) * 1000
+        if not self.enabled:
+            return
+
+        rows = getattr(cursor, "rowcount", -1) or 0
+        key = fingerprint(statement)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                if len(self._stats) >= self.max_fingerprints:
+                    key = "<other>"
+                    stats = self._stats.get(key)
+                if stats is None:
+                    stats = self._stats[key] = StatementStats(key, self.sample_size)
+            stats.record(elapsed_ms, rows)
+
+        if elapsed_ms >= self.slow_threshold_ms and random.random() < self.sample_rate:
+            plan = None
+            if self.explain and not executemany:
+                plan = self._explain(conn, statement, parameters)
+            entry = {
+                "timestamp": datetime.utcnow().isoformat(),
+                "fingerprint": key,
+                "statement": statement,
+                "elapsed_ms": round(elapsed_ms, 3),
+                "rows": rows,
+                "plan": plan,
+            }
+            with self._lock:
+                self._slow_log.append(entry)
+            logger.warning("Slow query (%.1fms, %d rows): %s", elapsed_ms, rows, key)
+
+    def _explain(self, conn, statement: str, parameters) -> Optional[List[str]]:
+        """Capture the plan inside a savepoint so a failed EXPLAIN can't abort the transaction."""
+        if conn.dialect.name != "postgresql" or not _EXPLAINABLE_RE.match(statement):
+            return None
+        cursor = conn.connection.dbapi_connection.cursor()
+        try:
+            cursor.execute("SAVEPOINT query_profiler_explain")
+            try:
+                cursor.execute(f"EXPLAIN {statement}", parameters)
+                plan = [row[0] for row in cursor.fetchall()]
+                cursor.execute("RELEASE SAVEPOINT query_profiler_explain")
+                return plan
+            except Exception as e:
+                cursor.execute("ROLLBACK TO SAVEPOINT query_profiler_explain")
+                logger.debug("EXPLAIN failed for slow query: %s", e)
+                return None
+        except Exception as e:
+            logger.debug("Could not capture EXPLAIN: %s", e)
+            return None
+        finally:
+            cursor.close()
+
+    def stats(self, order_by: str = "total_ms", limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Return per-fingerprint stats, sorted descending by the given field."""
+        with self._lock:
+            rows = [stats.to_dict() for stats in self._stats.values()]
+        rows.sort(key=lambda row: row[order_by], reverse=True)
+        return rows[:limit] if limit else rows
+
+    def get(self, statement: str) -> Optional[Dict[str, Any]]:
+        """Look up stats for a statement (raw or already fingerprinted)."""
+        with self._lock:
+            stats = self._stats.get(fingerprint(statement))
+            return stats.to_dict() if stats else None
+
+    def slow_queries(self) -> List[Dict[str, Any]]:
+        """Return the sampled slow-query log, oldest first."""
+        with self._lock:
+            return list(self._slow_log)
+
+    def reset(self) -> None:
+        """Drop all collected stats and slow-query entries."""
+        with self._lock:
+            self._stats.clear()
+            self._slow_log.clear()
+
+    def to_json(self, limit: Optional[int] = None) -> str:
+        """Serialize stats and the slow-query log to JSON."""
+        return json.dumps(
+            {
+                "slow_threshold_ms": self.slow_threshold_ms,
+                "statements": self.stats(limit=limit),
+                "slow_queries": self.slow_queries(),
+            },
+            default=str,
+        )
+
+    def dump(self, path: str, limit: Optional[int] = None) -> None:
+        """Write the JSON report to a file."""
+        with open(path, "w") as f:
+            f.write(self.to_json(limit=limit))
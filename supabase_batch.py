@@ -0,0 +1,217 @@
+"""
+Batched writes through the Supabase admin client for Zenith Microservices.
+Coalesces per-row inserts and RPC calls from fan-out jobs (notifications,
+audit logs, reactions) into bulk PostgREST requests.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional, Tuple
+
+from supabase_client import get_supabase_admin_client
+
+logger = logging.getLogger(__name__)
+
+# Group key: ("insert", table, None) or ("rpc", function, items_param)
+GroupKey = Tuple[str, str, Optional[str]]
+
+
+# SQLSTATE classes caused by the submitted rows: data exceptions and constraint violations
+ROW_ERROR_SQLSTATE_CLASSES = ("22", "23")
+ROW_ERROR_HTTP_STATUSES = (400, 409, 422)
+
+
+def is_row_error(error: Exception) -> bool:
+    """
+    Whether a failed request was rejected for the data in it (PostgREST 4xx).
+
+    Only these are worth splitting: transport errors, timeouts and 5xx say
+    nothing about individual rows, and after a timeout the server may have
+    committed the batch already.
+    """
+    code = getattr(error, "code", None)
+    if isinstance(code, str) and code:
+        if code.startswith("PGRST"):
+            # PGRST1xx: malformed request; PGRST204: unknown column. PGRST0xx are connection errors.
+            return code.startswith("PGRST1") or code == "PGRST204"
+        return code[:2] in ROW_ERROR_SQLSTATE_CLASSES
+    status = getattr(getattr(error, "response", None), "status_code", None)
+    return status in ROW_ERROR_HTTP_STATUSES
+
+
+class BatchQueueFull(Exception):
+    """Raised when the writer has too many pending items and the caller's wait timed out."""
+
+
+class BatchWriter:
+    """
+    Buffers inserts and RPC calls and sends them in bulk by size or time window.
+
+    Every submitted item gets a Future resolved with its own result or exception.
+    A batch rejected for its data is split in halves and retried so one bad row
+    only fails itself; transport and server errors fail the whole batch, unretried.
+    Submissions block once max_pending items are in flight (backpressure).
+    """
+
+    def __init__(
+        self,
+        client: Any = None,
+        max_batch_size: int = 500,
+        flush_interval: float = 0.5,
+        max_pending: int = 10000,
+        split_on_error: bool = True,
+    ):
+        self._client = client
+        self.max_batch_size = max_batch_size
+        self.flush_interval = flush_interval
+        self.split_on_error = split_on_error
+        self._pending: Dict[GroupKey, List[Tuple[Dict[str, Any], Future]]] = {}
+        self._first_enqueued: Dict[GroupKey, float] = {}
+        self._capacity = threading.BoundedSemaphore(max_pending)
+        self._cond = threading.Condition()
+        self._send_lock = threading.Lock()
+        self._closed = False
+        self.stats = {"items": 0, "requests": 0, "failed_items": 0, "splits": 0}
+        self._worker = threading.Thread(target=self._run, name="supabase-batch-writer", daemon=True)
+        self._worker.start()
+
+    @property
+    def client(self) -> Any:
+        if self._client is None:
+            self._client = get_supabase_admin_client()
+        return self._client
+
+    def insert(self, table: str, row: Dict[str, Any], timeout: Optional[float] = None) -> Future:
+        """Queue a row for bulk insert into table."""
+        return self._submit(("insert", table, None), row, timeout)
+
+    def rpc(
+        self,
+        function: str,
+        params: Dict[str, Any],
+        items_param: str = "p_items",
+        timeout: Optional[float] = None,
+    ) -> Future:
+        """Queue a call to a set-based RPC that takes all queued params as one array argument."""
+        return self._submit(("rpc", function, items_param), params, timeout)
+
+    def _submit(self, key: GroupKey, payload: Dict[str, Any], timeout: Optional[float]) -> Future:
+        if self._closed:
+            raise RuntimeError("BatchWriter is closed")
+        if not self._capacity.acquire(timeout=timeout):
+            raise BatchQueueFull(f"Timed out waiting to queue write for {key[1]}")
+        future: Future = Future()
+        future.add_done_callback(lambda _: self._capacity.release())
+        with self._cond:
+            group = self._pending.setdefault(key, [])
+            if not group:
+                self._first_enqueued[key] = time.monotonic()
+            group.append((payload, future))
+            if len(group) >= self.max_batch_size:
+                self._cond.notify()
+        return future
+
+    def _take_due(self, force: bool) -> List[Tuple[GroupKey, List[Tuple[Dict[str, Any], Future]]]]:
+        """Pop every group that is full, older than the flush window, or all of them if forced."""
+        now = time.monotonic()
+        due = []
+        for key in list(self._pending):
+            group = self._pending[key]
+            if force or len(group) >= self.max_batch_size or now - self._first_enqueued[key] >= self.flush_interval:
+                del self._pending[key]
+                del self._first_enqueued[key]
+                for start in range(0, len(group), self.max_batch_size):
+                    due.append((key, group[start:start + self.max_batch_size]))
+        return due
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                if not self._closed:
+                    self._cond.wait(timeout=self.flush_interval)
+                closed = self._closed
+                due = self._take_due(force=closed)
+            for key, batch in due:
+                self._send(key, batch)
+            if closed:
+                return
+
+    def _send(self, key: GroupKey, batch: List[Tuple[Dict[str, Any], Future]]) -> None:
+        kind, name, items_param = key
+        payloads = [payload for payload, _ in batch]
+        with self._send_lock:
+            self.stats["requests"] += 1
+        try:
+            if kind == "insert":
+                response = self.client.table(name).insert(payloads).execute()
+            else:
+                response = self.client.rpc(name, {items_param: payloads}).execute()
+        except Exception as e:
+            if self.split_on_error and len(batch) > 1 and is_row_error(e):
+                with self._send_lock:
+                    self.stats["splits"] += 1
+                middle = len(batch) // 2
+                self._send(key, batch[:middle])
+                self._send(key, batch[middle:])
+                return
+            logger.warning("Batched %s to %s failed for %d item(s): %s", kind, name, len(batch), e)
+            with self._send_lock:
+                self.stats["failed_items"] += len(batch)
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        data = getattr(response, "data", None)
+        rows = data if isinstance(data, list) and len(data) == len(batch) else None
+        with self._send_lock:
+            self.stats["items"] += len(batch)
+        for index, (_, future) in enumerate(batch):
+            future.set_result(rows[index] if rows is not None else data)
+
+    def flush(self) -> None:
+        """Send everything queued so far and wait for it to complete."""
+        with self._cond:
+            due = self._take_due(force=True)
+        for key, batch in due:
+            self._send(key, batch)
+
+    def close(self) -> None:
+        """Flush remaining items and stop the background thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._worker.join()
+
+    def __enter__(self) -> "BatchWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def log_sensitive_action(
+    writer: BatchWriter,
+    action: str,
+    resource_type: str,
+    user_id: Optional[str] = None,
+    resource_id: Optional[str] = None,
+    metadata: Optional[Dict[str, Any]] = None,
+    ip_address: Optional[str] = None,
+    user_agent: Optional[str] = None,
+) -> Future:
+    """
+    Queue an audit_logs row.
+
+    Server-side equivalent of the log_sensitive_action() SQL function, which
+    takes the user from auth.uid() and so can't be used with the service role.
+    """
+    return writer.insert("audit_logs", {
+        "user_id": user_id,
+        "action": action,
+        "resource_type": resource_type,
+        "resource_id": resource_id,
+        "metadata": metadata or {},
+        "ip_address": ip_address,
+        "user_agent": user_agent,
+    })
@@ -1,53 +1,319 @@
 """
 Supabase client configuration for Zenith Microservices.
 Provides Supabase client instances for authentication, database, and storage operations.
+Clients are created lazily, once per process, on first use.
 """
+import asyncio
+import base64
+import hashlib
+import json
 import os
-from supabase import create_client, Client
-from gotrue import AuthResponse
-from typing import Optional
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Awaitable, Dict, Optional, Tuple, TypeVar
+
+if TYPE_CHECKING:
+    import httpx
+    from supabase import AsyncClient, Client
+
+T = TypeVar("T")
+
+# Conditional import for local JWT verification
+try:
+    import jwt
+    JWT_AVAILABLE = True
+except ImportError:
+    JWT_AVAILABLE = False
 
 # Supabase configuration from environment variables
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_ANON_KEY = os.getenv("SUPABASE_ANON_KEY")
 SUPABASE_SERVICE_ROLE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
 
-# Validate required environment variables
-if not SUPABASE_URL:
-    raise ValueError("SUPABASE_URL environment variable is required")
-if not SUPABASE_ANON_KEY:
-    raise ValueError("SUPABASE_ANON_KEY environment variable is required")
+# Local JWT verification: HS256 with the project secret, or asymmetric keys from JWKS
+SUPABASE_JWT_SECRET = os.getenv("SUPABASE_JWT_SECRET")
+SUPABASE_JWT_AUDIENCE = os.getenv("SUPABASE_JWT_AUDIENCE", "authenticated")
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "4096"))
+TOKEN_CACHE_TTL = float(os.getenv("TOKEN_CACHE_TTL", "300"))
+JWKS_CACHE_TTL = int(os.getenv("JWKS_CACHE_TTL", "600"))
 
-# Create Supabase client with anonymous key (for client-side operations)
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_ANON_KEY)
+# Shared HTTP connection pool for the async clients
+SUPABASE_HTTP_MAX_CONNECTIONS = int(os.getenv("SUPABASE_HTTP_MAX_CONNECTIONS", "100"))
+SUPABASE_HTTP_MAX_KEEPALIVE = int(os.getenv("SUPABASE_HTTP_MAX_KEEPALIVE", "20"))
+SUPABASE_HTTP_KEEPALIVE_EXPIRY = float(os.getenv("SUPABASE_HTTP_KEEPALIVE_EXPIRY", "30"))
+SUPABASE_HTTP_TIMEOUT = float(os.getenv("SUPABASE_HTTP_TIMEOUT", "10"))
+SUPABASE_HTTP2 = os.getenv("SUPABASE_HTTP2", "true").lower() == "true"
 
-# Create Supabase client with service role key (for server-side operations)
-supabase_admin: Optional[Client] = None
-if SUPABASE_SERVICE_ROLE_KEY:
-    supabase_admin = create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
+_supabase: Optional["Client"] = None
+_supabase_admin: Optional["Client"] = None
+_client_lock = threading.Lock()
+_jwks_client: Optional["jwt.PyJWKClient"] = None
+_http_client: Optional["httpx.AsyncClient"] = None
+_async_supabase: Optional["AsyncClient"] = None
+_async_supabase_admin: Optional["AsyncClient"] = None
+_async_client_lock: Optional[asyncio.Lock] = None
 
-def get_supabase_client() -> Client:
+def _create_client(key: str) -> "Client":
+    from supabase import create_client
+    return create_client(SUPABASE_URL, key)
+
+def get_supabase_client() -> "Client":
     """Get the main Supabase client for client-side operations."""
-    return supabase
+    global _supabase
+    if _supabase is None:
+        # Validate required environment variables
+        if not SUPABASE_URL:
+            raise ValueError("SUPABASE_URL environment variable is required")
+        if not SUPABASE_ANON_KEY:
+            raise ValueError("SUPABASE_ANON_KEY environment variable is required")
+        with _client_lock:
+            if _supabase is None:
+                _supabase = _create_client(SUPABASE_ANON_KEY)
+    return _supabase
 
-def get_supabase_admin_client() -> Client:
+def get_supabase_admin_client() -> "Client":
     """Get the Supabase admin client for server-side operations."""
-    if not supabase_admin:
-        raise ValueError("SUPABASE_SERVICE_ROLE_KEY not configured")
-    return supabase_admin
+    global _supabase_admin
+    if _supabase_admin is None:
+        if not SUPABASE_URL:
+            raise ValueError("SUPABASE_URL environment variable is required")
+        if not SUPABASE_SERVICE_ROLE_KEY:
+            raise ValueError("SUPABASE_SERVICE_ROLE_KEY not configured")
+        with _client_lock:
+            if _supabase_admin is None:
+                _supabase_admin = _create_client(SUPABASE_SERVICE_ROLE_KEY)
+    return _supabase_admin
+
+def get_http_client() -> "httpx.AsyncClient":
+    """Get the pooled (HTTP/2 when h2 is installed) client shared by the async Supabase clients."""
+    global _http_client
+    if _http_client is None:
+        import httpx
+        try:
+            import h2  # noqa: F401
+            http2 = SUPABASE_HTTP2
+        except ImportError:
+            http2 = False
+        _http_client = httpx.AsyncClient(
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=SUPABASE_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=SUPABASE_HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=SUPABASE_HTTP_KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(SUPABASE_HTTP_TIMEOUT),
+        )
+    return _http_client
+
+async def _create_async_client(key: str) -> "AsyncClient":
+    from supabase import AsyncClientOptions, acreate_client
+    try:
+        options = AsyncClientOptions(
+            httpx_client=get_http_client(),
+            postgrest_client_timeout=SUPABASE_HTTP_TIMEOUT,
+            storage_client_timeout=int(SUPABASE_HTTP_TIMEOUT),
+        )
+    except TypeError:
+        # Older supabase-py without httpx_client support; each sub-client pools on its own
+        options = AsyncClientOptions(
+            postgrest_client_timeout=SUPABASE_HTTP_TIMEOUT,
+            storage_client_timeout=int(SUPABASE_HTTP_TIMEOUT),
+        )
+    return await acreate_client(SUPABASE_URL, key, options=options)
+
+def _get_async_client_lock() -> asyncio.Lock:
+    global _async_client_lock
+    if _async_client_lock is None:
+        _async_client_lock = asyncio.Lock()
+    return _async_client_lock
+
+async def get_async_supabase_client() -> "AsyncClient":
+    """Get the async Supabase client for client-side operations."""
+    global _async_supabase
+    if _async_supabase is None:
+        if not SUPABASE_URL:
+            raise ValueError("SUPABASE_URL environment variable is required")
+        if not SUPABASE_ANON_KEY:
+            raise ValueError("SUPABASE_ANON_KEY environment variable is required")
+        async with _get_async_client_lock():
+            if _async_supabase is None:
+                _async_supabase = await _create_async_client(SUPABASE_ANON_KEY)
+    return _async_supabase
+
+async def get_async_supabase_admin_client() -> "AsyncClient":
+    """Get the async Supabase admin client for server-side operations."""
+    global _async_supabase_admin
+    if _async_supabase_admin is None:
+        if not SUPABASE_URL:
+            raise ValueError("SUPABASE_URL environment variable is required")
+        if not SUPABASE_SERVICE_ROLE_KEY:
+            raise ValueError("SUPABASE_SERVICE_ROLE_KEY not configured")
+        async with _get_async_client_lock():
+            if _async_supabase_admin is None:
+                _async_supabase_admin = await _create_async_client(SUPABASE_SERVICE_ROLE_KEY)
+    return _async_supabase_admin
+
+async def with_timeout(call: Awaitable[T], timeout: Optional[float] = None) -> T:
+    """Await a Supabase call with a per-call deadline (defaults to SUPABASE_HTTP_TIMEOUT)."""
+    return await asyncio.wait_for(call, SUPABASE_HTTP_TIMEOUT if timeout is None else timeout)
+
+async def aclose() -> None:
+    """Close the shared HTTP pool and drop the async clients (call on app shutdown)."""
+    global _http_client, _async_supabase, _async_supabase_admin
+    if _http_client is not None:
+        await _http_client.aclose()
+    _http_client = None
+    _async_supabase = None
+    _async_supabase_admin = None
+
+def dispose() -> None:
+    """Drop the cached clients; they are recreated on next use."""
+    global _supabase, _supabase_admin, _client_lock, _jwks_client
+    global _http_client, _async_supabase, _async_supabase_admin, _async_client_lock
+    _supabase = None
+    _supabase_admin = None
+    _jwks_client = None
+    _http_client = None
+    _async_supabase = None
+    _async_supabase_admin = None
+    _async_client_lock = None
+    _client_lock = threading.Lock()
+    token_cache.clear()
+
+class TokenCache:
+    """Thread-safe LRU of verified token claims keyed by token hash, bounded by TTL and exp."""
+
+    def __init__(self, max_size: int = TOKEN_CACHE_SIZE, ttl: float = TOKEN_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, claims = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return claims
+
+    def set(self, token: str, claims: Dict[str, Any]) -> None:
+        expires_at = time.time() + self.ttl
+        if isinstance(claims.get("exp"), (int, float)):
+            expires_at = min(expires_at, float(claims["exp"]))
+        if expires_at <= time.time():
+            return
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (expires_at, claims)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+token_cache = TokenCache()
+
+# Forked workers must not reuse HTTP sessions created in the parent
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=dispose)
+
+def __getattr__(name: str):
+    # Keep `from supabase_client import supabase` working without import-time clients
+    if name == "supabase":
+        return get_supabase_client()
+    if name == "supabase_admin":
+        return get_supabase_admin_client() if SUPABASE_SERVICE_ROLE_KEY else None
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def get_current_user(token: str):
     """Get current user from JWT token."""
     try:
-        user = supabase.auth.get_user(token)
+        user = get_supabase_client().auth.get_user(token)
         return user
     except Exception as e:
         return None
 
+def _get_jwks_client() -> "jwt.PyJWKClient":
+    global _jwks_client
+    if _jwks_client is None:
+        _jwks_client = jwt.PyJWKClient(
+            f"{SUPABASE_URL}/auth/v1/.well-known/jwks.json",
+            cache_keys=True,
+            lifespan=JWKS_CACHE_TTL,
+        )
+    return _jwks_client
+
+def _unverified_claims(token: str) -> Dict[str, Any]:
+    """Read a JWT payload without verifying it (only used after Supabase accepted the token)."""
+    try:
+        payload = token.split(".")[1]
+        return json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+    except Exception:
+        return {}
+
+def _decode_locally(token: str) -> Optional[Dict[str, Any]]:
+    """
+    Verify a token's signature and claims without calling Supabase.
+
+    Raises jwt.InvalidTokenError for tokens that are definitely invalid and
+    returns None when no local key is available for the token.
+    """
+    if not JWT_AVAILABLE:
+        return None
+    algorithm = jwt.get_unverified_header(token).get("alg")
+    if algorithm == "HS256":
+        if not SUPABASE_JWT_SECRET:
+            return None
+        key = SUPABASE_JWT_SECRET
+    elif algorithm in ("RS256", "ES256") and SUPABASE_URL:
+        try:
+            key = _get_jwks_client().get_signing_key_from_jwt(token).key
+        except jwt.PyJWKClientError:
+            return None
+    else:
+        return None
+    return jwt.decode(
+        token,
+        key,
+        algorithms=[algorithm],
+        audience=SUPABASE_JWT_AUDIENCE,
+        options={"require": ["exp", "sub"]},
+    )
+
+def decode_token(token: str) -> Optional[Dict[str, Any]]:
+    """Return verified claims for a token, or None if it is invalid."""
+    claims = token_cache.get(token)
+    if claims is not None:
+        return claims
+    try:
+        claims = _decode_locally(token)
+    except Exception:
+        return None
+    if claims is None:
+        # No local key for this token - fall back to asking Supabase
+        user = get_current_user(token)
+        if user is None or getattr(user, "user", None) is None:
+            return None
+        claims = {"sub": user.user.id, **_unverified_claims(token)}
+    token_cache.set(token, claims)
+    return claims
+
 def verify_token(token: str) -> bool:
     """Verify if a JWT token is valid."""
     try:
-        user = get_current_user(token)
-        return user is not None
+        return decode_token(token) is not None
     except Exception:
-        return False
\ No newline at end of file
+        return False